@@ -0,0 +1,90 @@
+# bench/bench_boot.py
+# Mide el arranque en frío: la comprobación del esquema de start.sh
+# (init_db.py) y el tiempo hasta que todos los workers de gunicorn están
+# listos, con la aplicación cargada una vez en el maestro (preload) o en cada
+# worker. Los tiempos de los workers salen del log de post_worker_init en
+# gunicorn.conf.py; además se mide la primera respuesta de /login.
+#
+#     DATABASE_URL=postgresql://... python bench/bench_boot.py --workers 4 --runs 5
+#
+# Solo usa la biblioteca estándar (y gunicorn).
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+READY_RE = re.compile(r'Worker \d+ listo en')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_init_db():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'init_db.py'], cwd=REPO_DIR, check=True, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def boot(workers, preload, worker_class, timeout=60.0):
+    # Devuelve (ms desde el lanzamiento hasta que el último worker está listo,
+    # ms de la primera respuesta de /login).
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0')
+    start = time.perf_counter()
+    process = subprocess.Popen(['gunicorn', 'app:create_app()', '-k', worker_class, '-w', str(workers),
+                                '--bind', '127.0.0.1:%d' % port, '--log-level', 'info'],
+                               cwd=REPO_DIR, env=env, stderr=subprocess.PIPE, text=True)
+    try:
+        ready = 0
+        deadline = time.monotonic() + timeout
+        while ready < workers:
+            line = process.stderr.readline()
+            if not line or time.monotonic() > deadline:
+                raise SystemExit('gunicorn no arrancó los %d workers' % workers)
+            if READY_RE.search(line):
+                ready += 1
+        ready_ms = (time.perf_counter() - start) * 1000
+        first_response = None
+        while first_response is None:
+            request_start = time.perf_counter()
+            try:
+                urllib.request.urlopen('http://127.0.0.1:%d/login' % port, timeout=5).read()
+                first_response = (time.perf_counter() - request_start) * 1000
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.01)
+        return ready_ms, first_response
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arranque en frío de la aplicación con y sin preload.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--worker-class', default='sync')
+    args = parser.parse_args()
+
+    init_times = [time_init_db() for _ in range(args.runs)]
+    print(f'{"init_db.py (esquema al día)":<32} {statistics.median(init_times):>8.0f} ms')
+    print(f'{"modo":<32} {"workers listos":>14} {"1.ª respuesta":>14}')
+    for preload in (False, True):
+        results = [boot(args.workers, preload, args.worker_class) for _ in range(args.runs)]
+        ready, first = (statistics.median(values) for values in zip(*results))
+        label = 'preload' if preload else 'app cargada en cada worker'
+        print(f'{label:<32} {ready:>11.0f} ms {first:>11.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# bench/bench_bulk.py
+# Compara el rendimiento de las rutas por tarea (/add, /complete, /delete)
+# con las operaciones en lote de /api/tasks/bulk*. Usa el cliente de pruebas de
+# Flask contra la base de datos de DATABASE_URL (¡crea y borra tareas reales!).
+#
+#     DATABASE_URL=postgresql://... python bench/bench_bulk.py --tasks 500
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app, get_db  # noqa: E402
+
+BENCH_USERNAME = 'bench_bulk_user'
+
+app = create_app()
+
+
+def ensure_user():
+    with app.app_context():
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute('INSERT INTO users (username, password_hash) VALUES (%s, %s) '
+                       'ON CONFLICT (username) DO NOTHING', (BENCH_USERNAME, '-'))
+        cursor.execute('SELECT id FROM users WHERE username = %s', (BENCH_USERNAME,))
+        user_id = cursor.fetchone()['id']
+        db.commit()
+        cursor.close()
+    return user_id
+
+
+def created_task_ids(user_id):
+    with app.app_context():
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute('SELECT id FROM tasks WHERE created_by = %s ORDER BY id', (user_id,))
+        task_ids = [row['id'] for row in cursor.fetchall()]
+        cursor.close()
+    return task_ids
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {count:>7} tareas {elapsed:>9.3f}s {count / elapsed:>10.1f} tareas/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rutas por tarea frente a operaciones en lote')
+    parser.add_argument('--tasks', type=int, default=500, help='tareas por operación (máx. BULK_MAX_TASKS por lote)')
+    args = parser.parse_args()
+    count = args.tasks
+
+    user_id = ensure_user()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    def per_task_add():
+        for i in range(count):
+            client.post('/add', data={'task_description': f'bench {i}', 'due_date': '2030-01-01',
+                                      'priority': 'Media', 'assigned_users': [str(user_id)]})
+
+    def per_task(route):
+        def run():
+            for task_id in created_task_ids(user_id):
+                client.get(f'/{route}/{task_id}')
+        return run
+
+    def bulk_add():
+        tasks = [{'task_description': f'bench {i}', 'due_date': '2030-01-01', 'priority': 'Media',
+                  'assigned_users': [user_id]} for i in range(count)]
+        response = client.post('/api/tasks/bulk', json={'tasks': tasks})
+        assert response.status_code == 201, response.get_json()
+
+    def bulk(route):
+        def run():
+            response = client.post(f'/api/tasks/bulk/{route}', json={'task_ids': created_task_ids(user_id)})
+            assert response.status_code == 200, response.get_json()
+        return run
+
+    print('--- rutas por tarea ---')
+    results = {'add': timed('crear (/add)', count, per_task_add),
+               'complete': timed('completar (/complete)', count, per_task('complete')),
+               'delete': timed('eliminar (/delete)', count, per_task('delete'))}
+    print('--- operaciones en lote ---')
+    bulk_results = {'add': timed('crear (bulk)', count, bulk_add),
+                    'complete': timed('completar (bulk/complete)', count, bulk('complete')),
+                    'delete': timed('eliminar (bulk/delete)', count, bulk('delete'))}
+    print('--- aceleración ---')
+    for operation, elapsed in results.items():
+        print(f'{operation:<28} x{elapsed / bulk_results[operation]:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# bench/bench_transfer.py
+# Mide la importación con COPY (import_tasks.py) y la exportación en streaming
+# (/api/tasks/export) con muchas tareas de un solo usuario, y como referencia
+# el alta de tareas de una en una por /add. Genera un CSV sintético, lo
+# importa por lotes y lo vuelve a exportar leyendo la respuesta por partes.
+# Usa la base de datos de DATABASE_URL (¡crea y borra tareas reales!).
+#
+#     DATABASE_URL=postgresql://... python bench/bench_transfer.py --tasks 1000000
+#     python bench/bench_transfer.py --tasks 100000 --memory   # memoria máxima de Python (más lento)
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2  # noqa: E402
+
+from app import create_app  # noqa: E402
+from db import get_database_url  # noqa: E402
+from import_tasks import TaskImporter, read_records  # noqa: E402
+from seed import WORDS  # noqa: E402
+
+BENCH_USERNAME = 'bench_transfer_user'
+DELETE_BATCH_SIZE = 5000
+
+
+def reset_user(conn):
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT id FROM users WHERE username = %s', (BENCH_USERNAME,))
+        previous = cursor.fetchone()
+    if previous:
+        delete_tasks(conn, previous[0])
+    with conn.cursor() as cursor:
+        cursor.execute('DELETE FROM users WHERE username = %s', (BENCH_USERNAME,))
+        cursor.execute('INSERT INTO users (username, password_hash) VALUES (%s, %s) RETURNING id',
+                       (BENCH_USERNAME, '-'))
+        user_id = cursor.fetchone()[0]
+    conn.commit()
+    return user_id
+
+
+def delete_tasks(conn, user_id, batch_size=DELETE_BATCH_SIZE):
+    # Por lotes: los contadores se descuentan fila a fila, y en una sola
+    # transacción de un millón de borrados cada uno sería más lento que el anterior.
+    with conn.cursor() as cursor:
+        while True:
+            cursor.execute('DELETE FROM tasks WHERE id IN (SELECT id FROM tasks WHERE created_by = %s LIMIT %s)',
+                           (user_id, batch_size))
+            conn.commit()
+            if cursor.rowcount < batch_size:
+                return
+
+
+def write_csv(path, count, rng):
+    today = date.today()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('task_description', 'status', 'due_date', 'priority', 'is_public'))
+        for n in range(count):
+            due_date = today + timedelta(days=rng.randint(-365, 365)) if rng.random() < 0.8 else None
+            writer.writerow((' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 7))) + f' #{n}',
+                             'completed' if rng.random() < 0.3 else 'pending',
+                             due_date.isoformat() if due_date else '',
+                             rng.choice(('Baja', 'Media', 'Alta')), rng.random() < 0.2))
+
+
+def timed(label, count, func, measure_memory=False):
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = ''
+    if measure_memory:
+        peak = f' {tracemalloc.get_traced_memory()[1] / 2 ** 20:>8.1f} MiB máx.'
+        tracemalloc.stop()
+    print(f'{label:<28} {count:>8} tareas {elapsed:>9.2f}s {count / elapsed:>10.0f} tareas/s{peak}')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importación con COPY y exportación en streaming')
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--form-tasks', type=int, default=500, help='tareas creadas de una en una por /add')
+    parser.add_argument('--memory', action='store_true', help='medir la memoria máxima de Python (tracemalloc)')
+    parser.add_argument('--keep', action='store_true', help='no borrar las tareas al terminar')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(get_database_url())
+    user_id = reset_user(conn)
+    client = create_app().test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    def form_add():
+        for n in range(args.form_tasks):
+            client.post('/add', data={'task_description': f'formulario {n}', 'due_date': '2030-01-01',
+                                      'priority': 'Media'})
+
+    timed('alta por /add', args.form_tasks, form_add)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tareas.csv')
+        timed('generar CSV', args.tasks, lambda: write_csv(path, args.tasks, random.Random(42)))
+
+        def import_file():
+            importer = TaskImporter(conn, batch_size=args.batch_size)
+            for line, record in read_records(path, 'csv'):
+                importer.add(line, record, owner=BENCH_USERNAME)
+            importer.flush()
+            return importer
+
+        importer = timed('importar (COPY)', args.tasks, import_file, args.memory)
+        assert importer.imported == args.tasks, importer.imported
+
+    total = args.tasks + args.form_tasks
+    for export_format in ('csv', 'ndjson'):
+        def export():
+            response = client.get(f'/api/tasks/export?format={export_format}', buffered=False)
+            size = sum(len(chunk) for chunk in response.iter_encoded())
+            response.close()
+            return size
+
+        size = timed(f'exportar ({export_format})', total, export, args.memory)
+        print(f'{"":<28} {size / 2 ** 20:>8.1f} MiB')
+
+    if not args.keep:
+        start = time.perf_counter()
+        delete_tasks(conn, user_id)
+        with conn.cursor() as cursor:
+            cursor.execute('DELETE FROM users WHERE username = %s', (BENCH_USERNAME,))
+        conn.commit()
+        print(f'Datos de benchmark eliminados en {time.perf_counter() - start:.1f}s.')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# bench/compare.py
+# Compara dos resultados de bench/loadtest.py (por defecto, los dos más
+# recientes de bench/results) escenario a escenario.
+#
+#     python bench/compare.py                      # los dos últimos
+#     python bench/compare.py a1b2c3d e4f5a6b      # por nombre o ruta
+import argparse
+import glob
+import json
+import os
+import sys
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+METRICS = ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def load(name):
+    path = name if os.path.exists(name) else os.path.join(RESULTS_DIR, name + '.json')
+    with open(path) as source:
+        return json.load(source)
+
+
+def latest_two():
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), key=os.path.getmtime)
+    if len(paths) < 2:
+        sys.exit('Se necesitan al menos dos resultados en bench/results.')
+    return paths[-2], paths[-1]
+
+
+def change(before, after):
+    if before is None or after is None:
+        return '-'
+    if before == 0:
+        return '-'
+    return '%+.1f%%' % ((after - before) * 100.0 / before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara dos resultados de la prueba de carga.')
+    parser.add_argument('baseline', nargs='?')
+    parser.add_argument('candidate', nargs='?')
+    args = parser.parse_args()
+    if args.baseline and args.candidate:
+        baseline, candidate = load(args.baseline), load(args.candidate)
+    else:
+        baseline, candidate = (load(path) for path in latest_two())
+
+    print('Base:      %s (%s)' % (baseline['label'], baseline['timestamp']))
+    print('Candidato: %s (%s)' % (candidate['label'], candidate['timestamp']))
+    differences = sorted(key for key in set(baseline['config']) | set(candidate['config'])
+                         if baseline['config'].get(key) != candidate['config'].get(key))
+    if differences:
+        print('Configuración distinta en: %s' % ', '.join(differences))
+    print()
+    print('%-10s %-11s %10s %10s %9s' % ('escenario', 'métrica', 'base', 'candidato', 'cambio'))
+    for scenario, before in baseline['results'].items():
+        after = candidate['results'].get(scenario)
+        if after is None:
+            continue
+        for metric in METRICS:
+            print('%-10s %-11s %10s %10s %9s' % (
+                scenario, metric, _format(before[metric]), _format(after[metric]),
+                change(before[metric], after[metric])))
+
+
+def _format(value):
+    if value is None:
+        return '-'
+    return '%.1f' % value
+
+
+if __name__ == '__main__':
+    main()
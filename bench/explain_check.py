@@ -0,0 +1,184 @@
+# bench/explain_check.py
+# Comprueba los planes de las consultas de la lista de tareas: ejecuta
+# EXPLAIN (FORMAT JSON) sobre lo que genera build_task_list_query para cada
+# vista ("Mis Tareas" y la lista pública de otro usuario), filtro de estado,
+# orden, primera y segunda página, y búsquedas. Falla (código de salida 1) si
+# algún plan recorre tasks o task_assignments con un Seq Scan o no usa los
+# índices que esa consulta necesita.
+#
+# Si la base de datos no tiene datos de benchmark, los carga antes con
+# bench/seed.py (los planes solo son representativos con muchas filas).
+#
+#     DATABASE_URL=postgresql://... python bench/explain_check.py --tasks 200000
+import argparse
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask_login import login_user  # noqa: E402
+
+from app import (SORT_KEYS, TASKS_PAGE_SIZE, User, build_task_list_query, create_app,  # noqa: E402
+                 encode_page_cursor, get_db)
+from seed import BENCH_PREFIX  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+STATUS_FILTERS = ('all', 'pending', 'completed')
+# Una palabra muy frecuente y otra rara del vocabulario de seed.py.
+SEARCHES = ('revisar', 'migración')
+# Tablas grandes: un Seq Scan sobre ellas es un fallo (users es pequeña).
+NO_SEQ_SCAN = ('tasks', 'task_assignments')
+# Índices que debe usar cada consulta: cada elemento es un grupo de
+# alternativas, y el plan tiene que usar al menos una de cada grupo.
+MY_TASKS_INDEXES = [{'idx_tasks_created_by', 'idx_tasks_created_by_status'}, {'idx_task_assignments_user'},
+                    {'tasks_pkey'}]
+PUBLIC_INDEXES = {'idx_tasks_public_recent', 'idx_tasks_public_due_date', 'idx_tasks_public_priority'}
+# Sin filtro de estado, la página pública se lee directamente del índice de su orden.
+PUBLIC_SORT_INDEXES = {
+    'id_desc': 'idx_tasks_public_recent',
+    'id_asc': 'idx_tasks_public_recent',
+    'due_date_asc': 'idx_tasks_public_due_date',
+    'due_date_desc': 'idx_tasks_public_due_date',
+    'priority_desc': 'idx_tasks_public_priority',
+    'priority_asc': 'idx_tasks_public_priority',
+}
+
+app = create_app()
+
+
+def ensure_seeded(args):
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM users WHERE username LIKE %s) AS seeded',
+                       (BENCH_PREFIX + '%',))
+        seeded = cursor.fetchone()['seeded']
+        cursor.close()
+    if seeded and not args.reseed:
+        return
+    subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'seed.py'), '--users', str(args.users),
+                    '--tasks', str(args.tasks)], check=True)
+
+
+def pick_users():
+    # El usuario de benchmark con más tareas (propias o asignadas) para "Mis
+    # Tareas", y otro con muchas tareas públicas para la lista pública: con
+    # más filas, más tentador es para el planificador recorrer la tabla entera.
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("""
+            SELECT u.id, u.username, count(*) AS total
+            FROM users u JOIN task_assignments a ON a.user_id = u.id
+            WHERE u.username LIKE %s
+            GROUP BY u.id ORDER BY total DESC LIMIT 1
+        """, (BENCH_PREFIX + '%',))
+        me = cursor.fetchone()
+        cursor.execute("""
+            SELECT created_by AS id, count(*) AS total FROM tasks
+            WHERE is_public AND created_by <> %s
+            GROUP BY created_by ORDER BY total DESC LIMIT 1
+        """, (me['id'],))
+        owner = cursor.fetchone()
+        cursor.close()
+    if owner is None:
+        sys.exit('No hay tareas públicas de otros usuarios con las que comprobar la lista pública.')
+    return User(me['id'], me['username']), owner['id']
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def second_page_cursor(cursor, query, params, sort_by):
+    # Cursor de la página siguiente a la primera (None si solo hay una página).
+    cursor.execute(query + ' LIMIT %s', params + [TASKS_PAGE_SIZE + 1])
+    rows = cursor.fetchall()
+    if len(rows) <= TASKS_PAGE_SIZE:
+        return None
+    last_row = rows[TASKS_PAGE_SIZE - 1]
+    return encode_page_cursor(sort_by, last_row['sort_key'], last_row['id'])
+
+
+def check_plan(cursor, query, params, required_indexes, analyze):
+    # Devuelve (problemas, índices usados, ms de ejecución o None).
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    cursor.execute('EXPLAIN (%s) %s LIMIT %%s' % (options, query), params + [TASKS_PAGE_SIZE + 1])
+    result = cursor.fetchone()['QUERY PLAN'][0]
+    used = set()
+    problems = []
+    for node in plan_nodes(result['Plan']):
+        if 'Index Name' in node:
+            used.add(node['Index Name'])
+        if node['Node Type'] == 'Seq Scan' and node['Relation Name'] in NO_SEQ_SCAN:
+            problems.append('Seq Scan on %s' % node['Relation Name'])
+    for alternatives in required_indexes:
+        if not alternatives & used:
+            problems.append('sin %s' % ' / '.join(sorted(alternatives)))
+    return problems, used, result.get('Execution Time')
+
+
+def cases(owner_id):
+    # (vista, filtro, orden, búsqueda, dueño de la lista pública o None, índices necesarios)
+    for view, shared_owner_id in (('mis tareas', None), ('pública', owner_id)):
+        for status_filter in STATUS_FILTERS:
+            for sort_by in SORT_KEYS:
+                if sort_by == 'relevance':
+                    continue
+                if shared_owner_id is None:
+                    required = MY_TASKS_INDEXES
+                elif status_filter == 'all':
+                    required = [{PUBLIC_SORT_INDEXES[sort_by]}]
+                else:
+                    # Con pocas filas del estado pedido, cualquier índice de las públicas es razonable.
+                    required = [PUBLIC_INDEXES]
+                yield view, status_filter, sort_by, '', shared_owner_id, required
+        # Con búsqueda, todos los órdenes: también los de id, que en "Mis Tareas"
+        # no pueden detenerse al llenar la página porque la búsqueda descarta filas.
+        for search in SEARCHES:
+            for sort_by in SORT_KEYS:
+                if shared_owner_id is None:
+                    required = MY_TASKS_INDEXES
+                else:
+                    required = [PUBLIC_INDEXES | {'idx_tasks_search'}]
+                yield view, 'all', sort_by, search, shared_owner_id, required
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comprueba los planes de las consultas de la lista de tareas.')
+    parser.add_argument('--users', type=int, default=100, help='usuarios de seed.py si hay que cargar datos')
+    parser.add_argument('--tasks', type=int, default=100000, help='tareas de seed.py si hay que cargar datos')
+    parser.add_argument('--reseed', action='store_true', help='volver a cargar los datos aunque ya existan')
+    parser.add_argument('--analyze', action='store_true', help='ejecutar las consultas (EXPLAIN ANALYZE) y '
+                                                                'mostrar su tiempo')
+    args = parser.parse_args()
+
+    ensure_seeded(args)
+    me, owner_id = pick_users()
+    failures = 0
+    with app.test_request_context():
+        login_user(me)
+        db = get_db()
+        cursor = db.cursor()
+        for view, status_filter, sort_by, search, shared_owner_id, required in cases(owner_id):
+            query, params = build_task_list_query(shared_owner_id, status_filter, sort_by, '', search=search)
+            page_cursor = second_page_cursor(cursor, query, params, sort_by)
+            pages = [('1', '')] + ([('2', page_cursor)] if page_cursor else [])
+            for page, page_cursor in pages:
+                query, params = build_task_list_query(shared_owner_id, status_filter, sort_by, page_cursor,
+                                                      search=search)
+                problems, used, elapsed = check_plan(cursor, query, params, required, args.analyze)
+                failures += bool(problems)
+                label = f'{view} {status_filter} {sort_by} q={search!r} pág. {page}'
+                timing = f' {elapsed:8.1f} ms' if elapsed is not None else ''
+                print(f'{"FALLA" if problems else "ok":<6}{label:<52}{timing} {", ".join(sorted(used))}'
+                      + (f'  <- {"; ".join(problems)}' if problems else ''))
+        cursor.close()
+        db.rollback()
+    print(f'{failures} planes con problemas.' if failures else 'Todos los planes usan los índices esperados.')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+# bench/loadtest.py
+# Prueba de carga de las rutas principales contra la aplicación servida por
+# gunicorn: cada usuario virtual inicia sesión con un usuario de bench/seed.py
+# y repite una mezcla de index (todos los filtros y órdenes), add, update y
+# complete; search (búsqueda en las descripciones) queda fuera de la mezcla
+# por defecto y se mide con --mix search=100. Informa de p50/p95/p99 y peticiones/s por escenario y guarda el
+# resultado en bench/results/<commit>.json para compararlo con bench/compare.py.
+#
+#     python bench/seed.py --users 100 --tasks 100000
+#     python bench/loadtest.py --spawn --workers 4 --concurrency 32 --duration 60
+#
+# Solo usa la biblioteca estándar. Con --spawn arranca gunicorn con la
+# DATABASE_URL del entorno; sin él, usa la aplicación de --base-url.
+import argparse
+import http.client
+import http.cookiejar
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+STATUS_FILTERS = ('all', 'pending', 'completed')
+SORTS = ('id_desc', 'due_date_asc', 'due_date_desc', 'priority_desc', 'priority_asc')
+PRIORITIES = ('Baja', 'Media', 'Alta')
+# Términos de búsqueda sobre el vocabulario de bench/seed.py: palabras
+# frecuentes y raras, frases, exclusiones y fragmentos de palabra.
+SEARCH_TERMS = ('informe', 'reunión cliente', 'presupuesto anual', 'migración', 'incidencia soporte',
+                '"copia seguridad"', 'factur', 'logíst', 'ventas -marketing', 'auditoría trimestral')
+DEFAULT_MIX = 'index=70,add=10,update=10,complete=10'
+# Los mensajes flash se guardan en la cookie de sesión hasta que index los
+# muestra; si crece demasiado se consume con una petición no medida.
+MAX_SESSION_COOKIE = 3000
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Se mide solo la ruta, no la página a la que redirige.
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}  # escenario -> [latencias en segundos]
+        self.errors = {}   # escenario -> número de errores
+
+    def add(self, scenario, elapsed, ok):
+        with self._lock:
+            if ok:
+                self.samples.setdefault(scenario, []).append(elapsed)
+            else:
+                self.errors[scenario] = self.errors.get(scenario, 0) + 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Percentil por rango más cercano.
+    position = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[position]
+
+
+def summarize(latencies, errors, duration):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / duration if duration else 0.0,
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'max_ms': _ms(latencies[-1] if latencies else None),
+    }
+
+
+def _ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+class VirtualUser:
+    def __init__(self, base_url, username, rng):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.rng = rng
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect())
+        self.own_task_ids = []
+
+    def request(self, path, data=None):
+        body = urllib.parse.urlencode(data, doseq=True).encode() if data is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, body, timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            status = error.code
+        except (urllib.error.URLError, http.client.HTTPException, OSError):
+            status = None
+        return time.perf_counter() - start, status is not None and status < 400
+
+    def login(self):
+        return self.request('/login', {'username': self.username})
+
+    def load_own_tasks(self):
+        # Ids de tareas propias (las únicas que se pueden editar o completar).
+        with self.opener.open(self.base_url + '/api/tasks?per_page=200', timeout=60) as response:
+            payload = json.loads(response.read())
+        columns = payload['columns']
+        id_column = columns.index('id')
+        owner_column = columns.index('created_by_username')
+        self.own_task_ids = [row[id_column] for row in payload['tasks'] if row[owner_column] == self.username]
+
+    def consume_flashes_if_needed(self):
+        if sum(len(cookie.value or '') for cookie in self.cookies) > MAX_SESSION_COOKIE:
+            self.request('/?per_page=1')
+
+    def _task_form(self):
+        due_date = date.today() + timedelta(days=self.rng.randint(-30, 90))
+        return {
+            'task_description': 'Tarea de carga %d' % self.rng.randint(1, 10 ** 9),
+            'due_date': due_date.isoformat(),
+            'priority': self.rng.choice(PRIORITIES),
+        }
+
+    def index(self):
+        query = {'status_filter': self.rng.choice(STATUS_FILTERS), 'sort_by': self.rng.choice(SORTS)}
+        return self.request('/?' + urllib.parse.urlencode(query))
+
+    def search(self):
+        query = {'q': self.rng.choice(SEARCH_TERMS), 'status_filter': self.rng.choice(STATUS_FILTERS)}
+        return self.request('/?' + urllib.parse.urlencode(query))
+
+    def add(self):
+        form = self._task_form()
+        if self.rng.random() < 0.2:
+            form['is_public'] = 'on'
+        return self.request('/add', form)
+
+    def update(self):
+        if not self.own_task_ids:
+            return self.add()
+        form = self._task_form()
+        form.update(status='pending', completed_photo_url='')
+        return self.request('/update/%d' % self.rng.choice(self.own_task_ids), form)
+
+    def complete(self):
+        if not self.own_task_ids:
+            return self.add()
+        return self.request('/complete/%d' % self.rng.choice(self.own_task_ids))
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('index', 'add', 'update', 'complete', 'search'):
+            raise SystemExit('Escenario desconocido en --mix: %s' % name)
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_user(number, args, mix, recorder, warmup_until, deadline):
+    rng = random.Random(args.seed * 100003 + number)
+    user = VirtualUser(args.base_url, '%s%d' % (args.user_prefix, number % args.users), rng)
+    elapsed, ok = user.login()
+    recorder.add('login', elapsed, ok)
+    if not ok:
+        return
+    try:
+        user.load_own_tasks()
+    except (urllib.error.URLError, OSError, ValueError, KeyError):
+        pass
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        elapsed, ok = getattr(user, scenario)()
+        if time.monotonic() >= warmup_until:
+            recorder.add(scenario, elapsed, ok)
+        user.consume_flashes_if_needed()
+
+
+def wait_for_server(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base_url.rstrip('/') + '/login', timeout=2).read()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise SystemExit('La aplicación no responde en %s' % base_url)
+
+
+def spawn_gunicorn(args):
+    bind = urllib.parse.urlsplit(args.base_url).netloc
+    command = ['gunicorn', 'app:create_app()', '-k', args.worker_class, '-w', str(args.workers),
+               '--bind', bind] + args.gunicorn_arg
+    print('Arrancando: %s' % ' '.join(command))
+    return subprocess.Popen(command, cwd=REPO_DIR)
+
+
+def git_revision():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=REPO_DIR) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return revision, dirty
+
+
+def print_report(results):
+    print()
+    print('%-10s %10s %7s %9s %9s %9s %9s %9s' % ('escenario', 'peticiones', 'errores', 'pet/s',
+                                                  'p50 ms', 'p95 ms', 'p99 ms', 'máx ms'))
+    for name, summary in results.items():
+        print('%-10s %10d %7d %9.1f %9s %9s %9s %9s' % (
+            name, summary['requests'], summary['errors'], summary['throughput'],
+            *('-' if summary[key] is None else summary[key] for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de las rutas de la aplicación.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--spawn', action='store_true', help='arrancar gunicorn en --base-url durante la prueba')
+    parser.add_argument('--workers', type=int, default=4, help='workers de gunicorn con --spawn')
+    parser.add_argument('--worker-class', default='sync', help='clase de worker de gunicorn con --spawn (sync, gevent)')
+    parser.add_argument('--gunicorn-arg', action='append', default=[],
+                        help='argumento extra para gunicorn con --spawn (repetible)')
+    parser.add_argument('--concurrency', type=int, default=16, help='usuarios virtuales simultáneos')
+    parser.add_argument('--duration', type=float, default=30.0, help='segundos medidos')
+    parser.add_argument('--warmup', type=float, default=5.0, help='segundos iniciales sin medir')
+    parser.add_argument('--users', type=int, default=100, help='usuarios sembrados disponibles')
+    parser.add_argument('--user-prefix', default='bench_user_')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='pesos de los escenarios (por defecto %s)' % DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='', help='nombre del resultado (por defecto, el commit actual)')
+    parser.add_argument('--no-save', action='store_true', help='no guardar el resultado en bench/results')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    server = spawn_gunicorn(args) if args.spawn else None
+    try:
+        wait_for_server(args.base_url)
+        recorder = Recorder()
+        started = time.monotonic()
+        warmup_until = started + args.warmup
+        deadline = warmup_until + args.duration
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [executor.submit(run_user, number, args, mix, recorder, warmup_until, deadline)
+                       for number in range(args.concurrency)]
+            for future in futures:
+                future.result()
+        measured = max(0.001, time.monotonic() - warmup_until)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    results = {}
+    for name in ['login'] + list(mix):
+        results[name] = summarize(recorder.samples.get(name, []), recorder.errors.get(name, 0),
+                                  measured if name != 'login' else 0)
+    all_latencies = [value for name in mix for value in recorder.samples.get(name, [])]
+    results['total'] = summarize(all_latencies, sum(recorder.errors.get(name, 0) for name in mix), measured)
+    print_report(results)
+
+    if args.no_save:
+        return
+    revision, dirty = git_revision()
+    label = args.label or (revision + ('-dirty' if dirty else ''))
+    report = {
+        'label': label,
+        'revision': revision,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {
+            'base_url': args.base_url,
+            'workers': args.workers if args.spawn else None,
+            'worker_class': args.worker_class if args.spawn else None,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'users': args.users,
+            'mix': mix,
+            'seed': args.seed,
+        },
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'results': results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, '%s.json' % label)
+    with open(path, 'w') as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+    print('\nResultado guardado en %s' % os.path.relpath(path, REPO_DIR))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# bench/seed.py
+# Carga datos sintéticos en la base de datos de DATABASE_URL para las pruebas
+# de carga: usuarios "bench_user_<n>", tareas repartidas entre ellos y
+# asignaciones. Usa COPY por lotes, así que millones de filas tardan minutos.
+#
+#     python bench/seed.py --users 200 --tasks 200000 --assignments 1.5
+#     python bench/seed.py --clean    # elimina los datos de benchmark
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+BENCH_PREFIX = 'bench_user_'
+PRIORITIES = (1, 2, 3)  # Baja, Media, Alta
+# Vocabulario de las descripciones, para que la búsqueda (parámetro q) tenga
+# términos frecuentes y raros como en datos reales.
+WORDS = ('revisar', 'enviar', 'preparar', 'llamar', 'actualizar', 'comprar', 'organizar', 'corregir',
+         'informe', 'presupuesto', 'factura', 'reunión', 'cliente', 'proveedor', 'contrato', 'inventario',
+         'servidor', 'copia', 'seguridad', 'nómina', 'campaña', 'presentación', 'pedido', 'documentación',
+         'mensual', 'trimestral', 'anual', 'urgente', 'pendiente', 'equipo', 'ventas', 'marketing',
+         'calidad', 'auditoría', 'formación', 'almacén', 'logística', 'soporte', 'incidencia', 'migración')
+BATCH_SIZE = 50000
+
+
+def connect():
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        sys.exit('DATABASE_URL no está configurada.')
+    return psycopg2.connect(database_url)
+
+
+def clean(conn):
+    with conn.cursor() as cursor:
+        # Las tareas y asignaciones se eliminan en cascada con los usuarios.
+        cursor.execute('DELETE FROM users WHERE username LIKE %s', (BENCH_PREFIX + '%',))
+        deleted = cursor.rowcount
+    conn.commit()
+    print(f'{deleted} usuarios de benchmark eliminados (con sus tareas y asignaciones).')
+
+
+def copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join('\\N' if value is None else str(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert('COPY %s (%s) FROM STDIN' % (table, ', '.join(columns)), buffer)
+
+
+def seed_users(conn, count):
+    with conn.cursor() as cursor:
+        copy_rows(cursor, 'users', ('username', 'password_hash'),
+                  ((f'{BENCH_PREFIX}{n}', '-') for n in range(count)))
+        cursor.execute('SELECT id FROM users WHERE username LIKE %s ORDER BY id', (BENCH_PREFIX + '%',))
+        user_ids = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    return user_ids
+
+
+def seed_tasks(conn, user_ids, count, assignments_per_task, public_ratio, rng):
+    today = date.today()
+    created = 0
+    with conn.cursor() as cursor:
+        while created < count:
+            batch = min(BATCH_SIZE, count - created)
+            # Reservar los ids de la secuencia para poder cargar las asignaciones
+            # con COPY sin tener que leer los ids generados.
+            cursor.execute("SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, %s)", (batch,))
+            task_ids = [row[0] for row in cursor.fetchall()]
+            tasks = []
+            assignments = []
+            for task_id in task_ids:
+                owner = rng.choice(user_ids)
+                due_date = today + timedelta(days=rng.randint(-365, 365)) if rng.random() < 0.8 else None
+                # Las primeras palabras del vocabulario aparecen mucho más que las últimas.
+                words = [WORDS[min(int(rng.expovariate(1 / 8)), len(WORDS) - 1)] for _ in range(rng.randint(3, 7))]
+                tasks.append((task_id, ' '.join(words) + f' #{task_id}',
+                              'completed' if rng.random() < 0.3 else 'pending',
+                              due_date.isoformat() if due_date else None,
+                              rng.choice(PRIORITIES), owner,
+                              rng.random() < public_ratio))
+                assignees = {owner}
+                extra = int(assignments_per_task) + (1 if rng.random() < assignments_per_task % 1 else 0)
+                for _ in range(max(0, extra - 1)):
+                    assignees.add(rng.choice(user_ids))
+                assignments.extend((task_id, user_id) for user_id in assignees)
+            copy_rows(cursor, 'tasks',
+                      ('id', 'task_description', 'status', 'due_date', 'priority', 'created_by', 'is_public'), tasks)
+            copy_rows(cursor, 'task_assignments', ('task_id', 'user_id'), assignments)
+            conn.commit()
+            created += batch
+            print(f'  {created}/{count} tareas', flush=True)
+        cursor.execute('ANALYZE tasks')
+        cursor.execute('ANALYZE task_assignments')
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga datos sintéticos para las pruebas de carga.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--assignments', type=float, default=1.5,
+                        help='asignaciones medias por tarea (el creador siempre está asignado)')
+    parser.add_argument('--public-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42, help='semilla aleatoria (datos reproducibles)')
+    parser.add_argument('--clean', action='store_true', help='eliminar los datos de benchmark y salir')
+    args = parser.parse_args()
+
+    conn = connect()
+    clean(conn)
+    if args.clean:
+        return
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    user_ids = seed_users(conn, args.users)
+    print(f'{len(user_ids)} usuarios creados.')
+    seed_tasks(conn, user_ids, args.tasks, args.assignments, args.public_ratio, rng)
+    print(f'Datos cargados en {time.perf_counter() - start:.1f}s.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+# bench/workers.py
+# Compara los workers síncronos de gunicorn con los de gevent: ejecuta
+# bench/loadtest.py con la misma carga para cada clase de worker y muestra la
+# comparación. Los argumentos que no reconoce se pasan a loadtest.py.
+#
+#     python bench/workers.py --workers 4 --concurrency 200 --duration 60
+import argparse
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Workers sync frente a gevent con la misma carga.')
+    parser.add_argument('--classes', default='sync,gevent', help='clases de worker a comparar, en orden')
+    parser.add_argument('--label', default='workers', help='prefijo de los resultados guardados')
+    args, loadtest_args = parser.parse_known_args()
+
+    labels = []
+    for worker_class in args.classes.split(','):
+        label = '%s-%s' % (args.label, worker_class)
+        print('\n== %s ==' % worker_class, flush=True)
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'loadtest.py'), '--spawn',
+                        '--worker-class', worker_class, '--label', label] + loadtest_args, check=True)
+        labels.append(label)
+
+    print()
+    subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'compare.py')] + labels[:2], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+# cache.py
+# Cachés en memoria del proceso, con invalidación compartida opcional entre
+# workers a través de Redis (si REDIS_URL está configurada y el paquete
+# "redis" está instalado).
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Redis es opcional
+    redis = None
+
+_shared_store = None
+_shared_store_pid = None
+
+
+def get_shared_store():
+    # Devuelve un cliente Redis o None si no hay almacén compartido disponible.
+    global _shared_store, _shared_store_pid
+    redis_url = os.environ.get('REDIS_URL')
+    if not redis_url or redis is None:
+        return None
+    if _shared_store is None or _shared_store_pid != os.getpid():
+        _shared_store = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+        _shared_store_pid = os.getpid()
+    return _shared_store
+
+
+class UserDirectory:
+    # Directorio de usuarios (id, username) cacheado en el proceso.
+    #
+    # Se invalida por versión: register() llama a invalidate(), que incrementa
+    # la versión local y, si hay Redis, la versión compartida, de modo que el
+    # resto de workers recargan en cuanto leen la nueva versión (como mucho un
+    # segundo después). Sin Redis, los demás workers ven los usuarios nuevos
+    # como mucho tras "ttl" segundos.
+    VERSION_KEY = 'tasks:user_directory:version'
+    # Segundos durante los que se reutiliza la versión compartida leída de
+    # Redis, para no hacer un GET en cada acceso al directorio.
+    SHARED_VERSION_INTERVAL = 1.0
+
+    def __init__(self, loader, ttl=60.0, store_factory=get_shared_store):
+        self._loader = loader
+        self._ttl = ttl
+        self._store_factory = store_factory
+        self._lock = threading.Lock()
+        # (usuarios, usuarios por id, índice de prefijos), sustituidos de una vez al recargar.
+        # El índice es una lista ordenada de (username en minúsculas, posición).
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._loaded_version = None
+        # (momento de la lectura, versión compartida leída), sustituidos de una vez.
+        self._shared = (None, None)
+        self.version = 0
+        self.loads = 0
+        self.hits = 0
+
+    def _shared_version(self):
+        read_at, version = self._shared
+        now = time.monotonic()
+        if read_at is not None and now - read_at < self.SHARED_VERSION_INTERVAL:
+            return version
+        store = self._store_factory()
+        version = None
+        if store is not None:
+            try:
+                version = store.get(self.VERSION_KEY)
+            except redis.RedisError:
+                pass
+        self._shared = (now, version)
+        return version
+
+    def _fresh_snapshot(self, shared_version):
+        snapshot = self._snapshot
+        if (snapshot is not None
+                and shared_version == self._loaded_version
+                and time.monotonic() - self._loaded_at < self._ttl):
+            return snapshot
+        return None
+
+    def _ensure_loaded(self):
+        shared_version = self._shared_version()
+        snapshot = self._fresh_snapshot(shared_version)
+        if snapshot is None:
+            with self._lock:
+                # Otro hilo puede haber recargado mientras se esperaba el cerrojo.
+                snapshot = self._fresh_snapshot(shared_version)
+                if snapshot is None:
+                    users = [{'id': row['id'], 'username': row['username']} for row in self._loader()]
+                    by_id = {user['id']: user for user in users}
+                    prefix_index = sorted((user['username'].lower(), position)
+                                          for position, user in enumerate(users))
+                    snapshot = self._snapshot = (users, by_id, prefix_index)
+                    self._loaded_at = time.monotonic()
+                    self._loaded_version = shared_version
+                    self.loads += 1
+                    return snapshot
+        self.hits += 1
+        return snapshot
+
+    def all(self):
+        return self._ensure_loaded()[0]
+
+    def get(self, user_id):
+        return self._ensure_loaded()[1].get(user_id)
+
+    def search(self, query, limit=10):
+        # Búsqueda por prefijo del nombre de usuario (sin distinguir mayúsculas)
+        # o por id exacto si la consulta es numérica.
+        users, by_id, index = self._ensure_loaded()
+        query = query.strip().lower()
+        if not query:
+            return []
+        results = []
+        if query.isdigit() and int(query) in by_id:
+            results.append(by_id[int(query)])
+        position = bisect.bisect_left(index, (query, -1))
+        while position < len(index) and len(results) < limit:
+            key, user_position = index[position]
+            if not key.startswith(query):
+                break
+            user = users[user_position]
+            if user not in results:
+                results.append(user)
+            position += 1
+        return results[:limit]
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self.version += 1
+        store = self._store_factory()
+        if store is not None:
+            try:
+                store.incr(self.VERSION_KEY)
+            except redis.RedisError:
+                pass
+        # La siguiente lectura ve ya la versión incrementada.
+        self._shared = (None, None)
+
+    def stats(self):
+        return {
+            'size': len(self._snapshot[0]) if self._snapshot is not None else 0,
+            'version': self.version,
+            'loads': self.loads,
+            'hits': self.hits,
+        }
+
+
+class TTLCache:
+    # Caché LRU con caducidad por entrada. Las entradas caducadas se eliminan
+    # al consultarlas; cuando se supera max_size se expulsa la menos usada.
+    def __init__(self, max_size=1024, ttl=300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (valor, caduca_en)
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+            }
+
+
+class VersionedCache:
+    # Caché de respuestas agrupadas (por ejemplo, las páginas de tareas públicas
+    # de un usuario) que se invalida por versión de grupo: invalidate(grupo)
+    # incrementa la versión local y, si hay Redis, la compartida, y las
+    # entradas guardadas con la versión anterior dejan de encontrarse. Sin
+    # Redis, el resto de workers solo lo ven a través de la versión de
+    # version(..., fallback); si no, las siguen sirviendo hasta "ttl" segundos.
+    #
+    # La versión se lee al empezar a atender la petición y se usa tanto para
+    # buscar como para guardar: si el grupo se invalida mientras se consulta la
+    # base de datos, el resultado se guarda con una versión que ya no se usa.
+    def __init__(self, name, max_size=512, ttl=30.0, store_factory=get_shared_store):
+        self.name = name
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+        self._store_factory = store_factory
+        self._lock = threading.Lock()
+        self._local_versions = {}
+        self.invalidations = 0
+
+    def _version_key(self, group):
+        return 'tasks:%s:%s:version' % (self.name, group)
+
+    def version(self, group, fallback=None):
+        # Sin Redis (o si no responde), fallback(grupo) da una versión común a
+        # todos los workers, por ejemplo leída de la base de datos; sin ella,
+        # los demás workers no ven la invalidación hasta que caduca la entrada.
+        local_version = self._local_versions.get(group, 0)
+        store = self._store_factory()
+        if store is not None:
+            try:
+                return local_version, store.get(self._version_key(group))
+            except redis.RedisError:
+                pass
+        return local_version, fallback(group) if fallback is not None else None
+
+    def get(self, group, version, key):
+        return self._entries.get((group, version, key))
+
+    def set(self, group, version, key, value):
+        self._entries.set((group, version, key), value)
+
+    def invalidate(self, group):
+        with self._lock:
+            self._local_versions[group] = self._local_versions.get(group, 0) + 1
+            self.invalidations += 1
+        store = self._store_factory()
+        if store is not None:
+            try:
+                store.incr(self._version_key(group))
+            except redis.RedisError:
+                pass
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return dict(self._entries.stats(), invalidations=self.invalidations)
@@ -0,0 +1,79 @@
+# counters.py
+# Resumen de tareas por usuario a partir de la tabla task_counters, que los
+# triggers de schema.sql mantienen en cada escritura: leer el resumen cuesta
+# lo mismo tenga el usuario diez tareas o un millón. Las tareas vencidas
+# dependen de la fecha actual y no se pueden precalcular: se cuentan con un
+# recorrido por rango de los índices de fecha de vencimiento.
+from datetime import date
+
+SCOPES = ('created', 'assigned')
+
+# Contadores esperados, calculados desde cero a partir de las tareas.
+EXPECTED_COUNTERS_SQL = """
+    SELECT created_by AS user_id, 'created' AS scope, status, priority, count(*) AS count
+    FROM tasks GROUP BY 1, 2, 3, 4
+    UNION ALL
+    SELECT a.user_id, 'assigned', t.status, t.priority, count(*)
+    FROM task_assignments a JOIN tasks t ON t.id = a.task_id GROUP BY 1, 2, 3, 4
+"""
+
+
+def _empty_scope():
+    return {'total': 0, 'by_status': {}, 'by_priority': {}, 'overdue': 0}
+
+
+def load_summary(cursor, user_id, today=None):
+    # Devuelve {'created': {...}, 'assigned': {...}} con el total, los totales
+    # por estado y por prioridad (por nombre: 'Alta', 'Media', 'Baja') y las
+    # tareas pendientes vencidas. Una tarea
+    # creada por el usuario y asignada a él cuenta en los dos alcances.
+    today = today or date.today()
+    summary = {scope: _empty_scope() for scope in SCOPES}
+    cursor.execute('SELECT scope, status, task_priority_name(priority), count FROM task_counters '
+                   'WHERE user_id = %s AND count <> 0', (user_id,))
+    for row in cursor.fetchall():
+        scope = summary.get(row[0])
+        if scope is None:
+            continue
+        status, priority, count = row[1], row[2], row[3]
+        scope['total'] += count
+        scope['by_status'][status] = scope['by_status'].get(status, 0) + count
+        scope['by_priority'][priority] = scope['by_priority'].get(priority, 0) + count
+
+    cursor.execute("""
+        SELECT
+            (SELECT count(*) FROM tasks
+             WHERE created_by = %s AND status = 'pending' AND due_date < %s),
+            (SELECT count(*) FROM task_assignments a JOIN tasks t ON t.id = a.task_id
+             WHERE a.user_id = %s AND t.status = 'pending' AND t.due_date < %s)
+    """, (user_id, today, user_id, today))
+    overdue = cursor.fetchone()
+    summary['created']['overdue'] = overdue[0]
+    summary['assigned']['overdue'] = overdue[1]
+    return summary
+
+
+def find_drift(cursor):
+    # Filas de task_counters que no coinciden con el recuento real:
+    # [(user_id, scope, status, priority, guardado, real)].
+    cursor.execute("""
+        SELECT COALESCE(e.user_id, c.user_id), COALESCE(e.scope, c.scope),
+               COALESCE(e.status, c.status), COALESCE(e.priority, c.priority),
+               COALESCE(c.count, 0), COALESCE(e.count, 0)
+        FROM (%s) e
+        FULL OUTER JOIN task_counters c
+            ON c.user_id = e.user_id AND c.scope = e.scope AND c.status = e.status AND c.priority = e.priority
+        WHERE COALESCE(c.count, 0) <> COALESCE(e.count, 0)
+        ORDER BY 1, 2, 3, 4
+    """ % EXPECTED_COUNTERS_SQL)
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def rebuild(cursor):
+    # Recalcula todos los contadores. Bloquea las escrituras en tasks y
+    # task_assignments hasta el final de la transacción, para que ningún
+    # trigger modifique los contadores mientras se reconstruyen.
+    cursor.execute('LOCK TABLE tasks, task_assignments IN SHARE MODE')
+    cursor.execute('DELETE FROM task_counters')
+    cursor.execute('INSERT INTO task_counters (user_id, scope, status, priority, count) ' + EXPECTED_COUNTERS_SQL)
+    return cursor.rowcount
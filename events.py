@@ -0,0 +1,199 @@
+# events.py
+# Cambios de tareas en tiempo real: las rutas que modifican tareas publican un
+# NOTIFY de PostgreSQL en la misma transacción (se entrega solo si se confirma)
+# y cada worker mantiene un hilo con LISTEN que reparte los avisos entre los
+# navegadores conectados a /events (Server-Sent Events).
+#
+# Cada conexión SSE mantiene una petición abierta, así que solo se activan con
+# workers de gevent (TASK_EVENTS=auto, por defecto). TASK_EVENTS=1 las fuerza
+# (por ejemplo con el servidor de desarrollo) y TASK_EVENTS=0 las desactiva;
+# sin ellas la página funciona igual, actualizando solo las filas que cambia
+# el propio usuario.
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+from db import configure_green_mode, get_database_url
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'task_events'
+KEEPALIVE_SECONDS = float(os.environ.get('TASK_EVENTS_KEEPALIVE', 20))
+QUEUE_SIZE = int(os.environ.get('TASK_EVENTS_QUEUE_SIZE', 100))
+# Los NOTIFY admiten menos de 8000 bytes: los cambios en lote se trocean.
+NOTIFY_CHUNK = 200
+
+
+def events_enabled():
+    mode = os.environ.get('TASK_EVENTS', 'auto')
+    if mode == 'auto':
+        return configure_green_mode()
+    return mode == '1'
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, max(len(values), 1), size):
+        yield values[start:start + size]
+
+
+def publish_task_change(cursor, op, task_ids, user_ids, public_owner_id=None):
+    # op: 'create', 'update' o 'delete'. user_ids son los usuarios en cuya lista
+    # "Mis Tareas" están (o estaban) las tareas; public_owner_id, el creador si
+    # alguna de ellas es (o era) pública, para avisar a quien vea su lista pública.
+    task_ids = sorted({int(task_id) for task_id in task_ids})
+    user_ids = sorted({int(user_id) for user_id in user_ids})
+    if not task_ids:
+        return
+    for task_chunk in _chunks(task_ids, NOTIFY_CHUNK):
+        for user_chunk in _chunks(user_ids, NOTIFY_CHUNK):
+            payload = json.dumps({'op': op, 'tasks': task_chunk, 'users': user_chunk, 'owner': public_owner_id},
+                                 separators=(',', ':'))
+            cursor.execute('SELECT pg_notify(%s, %s)', (CHANNEL, payload))
+
+
+class Subscription:
+    def __init__(self, user_id=None, owner_id=None):
+        # user_id: lista "Mis Tareas" de ese usuario. owner_id: lista pública de ese usuario.
+        self.user_id = user_id
+        self.owner_id = owner_id
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # El cliente no da abasto: se le pedirá recargar la página.
+            self.overflowed = True
+
+
+class TaskEventHub:
+    def __init__(self, dsn_factory=get_database_url):
+        self._dsn_factory = dsn_factory
+        self._lock = threading.Lock()
+        self._by_user = {}
+        self._by_owner = {}
+        self._thread = None
+        self._pid = None
+        self.notifications = 0
+        self.delivered = 0
+        self.reconnects = 0
+
+    def subscribe(self, user_id=None, owner_id=None):
+        subscription = Subscription(user_id, owner_id)
+        with self._lock:
+            self._ensure_listener()
+            if owner_id is not None:
+                self._by_owner.setdefault(owner_id, set()).add(subscription)
+            else:
+                self._by_user.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            index, key = ((self._by_owner, subscription.owner_id) if subscription.owner_id is not None
+                          else (self._by_user, subscription.user_id))
+            subscriptions = index.get(key)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del index[key]
+
+    def _ensure_listener(self):
+        # El hilo no sobrevive a fork(): cada worker arranca el suyo al recibir
+        # el primer suscriptor.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._by_user = {}
+        self._by_owner = {}
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='task-events-listener', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn_factory())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute('LISTEN %s' % CHANNEL)
+                backoff = 1.0
+                while True:
+                    # select() con gevent cede el control al resto de peticiones.
+                    select.select([conn], [], [], KEEPALIVE_SECONDS)
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(conn.notifies.pop(0).payload)
+            except Exception:
+                # Cualquier fallo (no solo de psycopg2) se registra y se reconecta:
+                # si el hilo terminara, el worker dejaría de repartir avisos.
+                logger.exception('Error en la escucha de %s; reconectando en %.0fs', CHANNEL, backoff)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
+            self.reconnects += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _dispatch(self, payload):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            change = None
+        if not isinstance(change, dict) or not isinstance(change.get('users', []), list):
+            logger.warning('Aviso de %s inválido: %r', CHANNEL, payload[:200])
+            return
+        self.notifications += 1
+        event = {'op': change.get('op'), 'tasks': change.get('tasks', [])}
+        with self._lock:
+            targets = set()
+            for user_id in change.get('users', []):
+                targets.update(self._by_user.get(user_id, ()))
+            if change.get('owner') is not None:
+                targets.update(self._by_owner.get(change['owner'], ()))
+        for subscription in targets:
+            subscription.put(event)
+        self.delivered += len(targets)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': sum(len(subs) for subs in self._by_user.values())
+                + sum(len(subs) for subs in self._by_owner.values()),
+                'notifications': self.notifications,
+                'delivered': self.delivered,
+                'reconnects': self.reconnects,
+            }
+
+
+def sse_stream(hub, subscription):
+    # Genera el flujo text/event-stream de una suscripción. Los comentarios
+    # periódicos mantienen viva la conexión y detectan clientes desconectados
+    # (la escritura falla y el generador se cierra).
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            if subscription.overflowed:
+                yield 'event: reload\ndata: {}\n\n'
+                return
+            try:
+                event = subscription.queue.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield 'event: task\ndata: %s\n\n' % json.dumps(event, separators=(',', ':'))
+    finally:
+        hub.unsubscribe(subscription)
+
+
+task_event_hub = TaskEventHub()
@@ -0,0 +1,43 @@
+# gunicorn.conf.py
+# Configuración de gunicorn (la lee por defecto desde el directorio de
+# trabajo; las opciones de start.sh y el Procfile tienen prioridad).
+#
+# Con preload_app el proceso maestro importa la aplicación y compila las
+# plantillas una sola vez, y cada worker empieza como una copia ya lista del
+# maestro en lugar de importar Flask y psycopg2 por su cuenta. Lo que no
+# sobrevive a fork() (conexiones, hilos de logging y de eventos, cliente de
+# Redis) se crea en cada worker después del fork. GUNICORN_PRELOAD=0 vuelve
+# a cargar la aplicación en cada worker.
+import os
+import time
+
+_started = time.monotonic()
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+if preload_app and worker_class == 'gevent':
+    # El maestro importa la aplicación antes de que el worker gevent parchee
+    # la biblioteca estándar: hay que parchearla antes, o los cerrojos y
+    # sockets creados al importar serían bloqueantes.
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def when_ready(server):
+    if preload_app:
+        from app import preload_templates
+        preload_templates(server.app.wsgi())
+    server.log.info('Maestro listo en %.0f ms', (time.monotonic() - _started) * 1000)
+
+
+def post_worker_init(worker):
+    # Ya dentro del worker (y con gevent parcheado): abre las conexiones
+    # mínimas del pool para que la primera petición no espere a conectarse.
+    from db import get_pool
+    try:
+        get_pool()
+    except Exception as e:
+        worker.log.warning('No se pudo abrir el pool de conexiones al arrancar: %s', e)
+    worker.log.info('Worker %s listo en %.0f ms desde el arranque', worker.pid,
+                    (time.monotonic() - _started) * 1000)
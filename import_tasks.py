@@ -0,0 +1,297 @@
+# import_tasks.py
+# Carga masiva de tareas y sus asignaciones desde un archivo CSV o NDJSON (el
+# formato de /api/tasks/export) con COPY. El archivo se lee y se carga por
+# lotes: cada lote se valida, se copia y se confirma en su propia transacción,
+# así que importar millones de tareas no necesita una transacción enorme ni
+# tener el archivo entero en memoria.
+#
+#     python import_tasks.py tareas.csv --user ana             # todas las tareas serán de ana
+#     python import_tasks.py tareas.ndjson                      # propietario: columna created_by_username
+#     python import_tasks.py tareas.csv --user ana --dry-run    # solo valida el archivo
+#
+# Columnas: task_description (obligatoria), status, due_date (AAAA-MM-DD),
+# priority (Baja, Media, Alta o 1-3), is_public, completed_photo_url,
+# created_by_username y assigned_users (nombres de usuario; en CSV separados
+# por ';'). Las columnas id y created_by se ignoran: las tareas reciben ids
+# nuevos. Sin asignados, la tarea se asigna a su propietario, como en el
+# formulario.
+#
+# Cada fila inválida se informa con su número de línea. Con más de
+# --max-errors filas inválidas (0 por defecto) la importación se detiene: los
+# lotes anteriores ya están confirmados y el actual se descarta.
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import psycopg2
+from werkzeug.security import generate_password_hash
+
+from cache import UserDirectory, VersionedCache
+from db import get_database_url
+from task_fields import ASSIGNED_USERS_SEPARATOR, TASK_STATUSES, parse_bool, parse_due_date, priority_code
+from task_jobs import schedule_reminders
+from task_versions import bump_task_versions
+
+DEFAULT_BATCH_SIZE = 10000
+FORMATS = ('csv', 'ndjson')
+TASK_COPY_COLUMNS = ('id', 'task_description', 'status', 'due_date', 'priority', 'created_by', 'is_public',
+                     'completed_photo_url')
+
+
+class ImportStopped(Exception):
+    pass
+
+
+class ImportedTask:
+    def __init__(self, line, description, status, due_date, priority, is_public, completed_photo_url,
+                 owner, assigned_users):
+        self.line = line
+        self.description = description
+        self.status = status
+        self.due_date = due_date
+        self.priority = priority
+        self.is_public = is_public
+        self.completed_photo_url = completed_photo_url
+        self.owner = owner
+        self.assigned_users = assigned_users
+
+    @property
+    def usernames(self):
+        return [self.owner] + self.assigned_users
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return 'ndjson' if extension in ('ndjson', 'jsonl') else 'csv'
+
+
+def read_records(path, file_format):
+    # (número de línea, fila) por cada tarea del archivo. En NDJSON, una línea
+    # que no es JSON se entrega como None y se informa al validarla.
+    if file_format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        return
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def parse_usernames(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(ASSIGNED_USERS_SEPARATOR)
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError('"assigned_users" debe ser una lista de nombres de usuario.')
+    return list(dict.fromkeys(name.strip() for name in value if name.strip()))
+
+
+def parse_record(line, record, owner=None):
+    # Valida una fila con las mismas reglas que el formulario de tareas.
+    # ValueError con el motivo si no es válida.
+    if not isinstance(record, dict):
+        raise ValueError('Fila inválida: se espera un objeto JSON por línea.')
+    description = str(record.get('task_description') or '').strip()
+    if not description:
+        raise ValueError('La descripción de la tarea no puede estar vacía.')
+    status = str(record.get('status') or 'pending').strip()
+    if status not in TASK_STATUSES:
+        raise ValueError(f'Estado inválido: {status!r}.')
+    try:
+        due_date = parse_due_date(str(record.get('due_date') or '').strip())
+    except ValueError:
+        raise ValueError('Formato de fecha de vencimiento inválido. Use AAAA-MM-DD.')
+    priority = str(record.get('priority') or 'Baja').strip()
+    try:
+        priority = int(priority) if priority in ('1', '2', '3') else priority_code(priority)
+    except ValueError:
+        raise ValueError(f'Prioridad inválida: {priority!r}.')
+    try:
+        is_public = parse_bool(record.get('is_public'))
+    except ValueError:
+        raise ValueError(f'Valor de is_public inválido: {record.get("is_public")!r}.')
+    completed_photo_url = str(record.get('completed_photo_url') or '').strip() or None
+    owner = owner or str(record.get('created_by_username') or '').strip()
+    if not owner:
+        raise ValueError('Falta el propietario: use --user o la columna created_by_username.')
+    assigned_users = parse_usernames(record.get('assigned_users')) or [owner]
+    return ImportedTask(line, description, status, due_date, priority, is_public, completed_photo_url,
+                        owner, assigned_users)
+
+
+def copy_rows(cursor, table, columns, rows):
+    # COPY en formato CSV: las descripciones pueden contener tabuladores,
+    # saltos de línea y barras invertidas. Un campo vacío sin comillas es NULL.
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert('COPY %s (%s) FROM STDIN WITH (FORMAT csv)' % (table, ', '.join(columns)), buffer)
+
+
+class TaskImporter:
+    def __init__(self, conn, batch_size=DEFAULT_BATCH_SIZE, max_errors=0, create_users=False, dry_run=False):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.create_users = create_users
+        self.dry_run = dry_run
+        self.user_ids = {}  # nombre de usuario -> id (None: se crearía, solo en --dry-run)
+        self.batch = []
+        self.imported = 0
+        self.assignments = 0
+        self.created_users = 0
+        self.new_users = False
+        self.errors = 0
+        self.last_committed_line = 0
+        # Solo invalida algo si REDIS_URL comparte las versiones con los workers.
+        self.public_task_cache = VersionedCache('public_tasks')
+        self.user_directory = UserDirectory(loader=None)
+
+    def error(self, line, message):
+        self.errors += 1
+        print(f'línea {line}: {message}', file=sys.stderr)
+        if self.errors > self.max_errors:
+            raise ImportStopped(line)
+
+    def add(self, line, record, owner=None):
+        try:
+            task = parse_record(line, record, owner)
+        except ValueError as e:
+            self.error(line, str(e))
+            return
+        self.batch.append(task)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def _resolve_users(self, cursor, usernames):
+        missing = sorted(set(usernames) - self.user_ids.keys())
+        if not missing:
+            return
+        cursor.execute('SELECT id, username FROM users WHERE username = ANY(%s)', (missing,))
+        self.user_ids.update((username, user_id) for user_id, username in cursor.fetchall())
+        missing = [username for username in missing if username not in self.user_ids]
+        if not missing or not self.create_users:
+            return
+        if self.dry_run:
+            self.user_ids.update((username, None) for username in missing)
+            return
+        # Como en el registro: no hay contraseña, el hash se calcula a partir del nombre.
+        for username in missing:
+            cursor.execute('INSERT INTO users (username, password_hash) VALUES (%s, %s) RETURNING id',
+                           (username, generate_password_hash(username)))
+            self.user_ids[username] = cursor.fetchone()[0]
+        self.created_users += len(missing)
+        self.new_users = True
+
+    def flush(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        self.new_users = False
+        try:
+            with self.conn.cursor() as cursor:
+                self._resolve_users(cursor, [username for task in batch for username in task.usernames])
+                tasks = []
+                for task in batch:
+                    unknown = [username for username in task.usernames if username not in self.user_ids]
+                    if unknown:
+                        self.error(task.line, 'Usuarios inexistentes: %s.' % ', '.join(unknown))
+                    else:
+                        tasks.append(task)
+                if self.dry_run:
+                    self.conn.rollback()
+                    self.imported += len(tasks)
+                    self.assignments += sum(len(task.assigned_users) for task in tasks)
+                    return
+                if tasks:
+                    self._copy(cursor, tasks)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.imported += len(tasks)
+        self.assignments += sum(len(task.assigned_users) for task in tasks)
+        self.last_committed_line = batch[-1].line
+        for owner_id in {self.user_ids[task.owner] for task in tasks if task.is_public}:
+            self.public_task_cache.invalidate(owner_id)
+        if self.new_users:
+            # El selector de usuarios de los workers los verá en su siguiente acceso.
+            self.user_directory.invalidate()
+
+    def _copy(self, cursor, tasks):
+        # Los ids se reservan de la secuencia para cargar también las
+        # asignaciones con COPY, sin leer los ids generados.
+        cursor.execute("SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, %s)",
+                       (len(tasks),))
+        task_ids = [row[0] for row in cursor.fetchall()]
+        copy_rows(cursor, 'tasks', TASK_COPY_COLUMNS,
+                  ((task_id, task.description, task.status, task.due_date, task.priority,
+                    self.user_ids[task.owner], task.is_public, task.completed_photo_url)
+                   for task_id, task in zip(task_ids, tasks)))
+        copy_rows(cursor, 'task_assignments', ('task_id', 'user_id'),
+                  ((task_id, self.user_ids[username])
+                   for task_id, task in zip(task_ids, tasks) for username in task.assigned_users))
+        # Nuevas versiones de los conjuntos de tareas afectados: los ETag de /api/tasks cambian.
+        bump_task_versions(cursor, {self.user_ids[username] for task in tasks for username in task.usernames})
+        # Recordatorios de las pendientes que aún no han vencido, como al crearlas
+        # desde el formulario (las fotos importadas no se comprueban).
+        schedule_reminders(cursor, [(task_id, task.due_date) for task_id, task in zip(task_ids, tasks)
+                                    if task.status == 'pending'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Importa tareas y asignaciones desde CSV o NDJSON con COPY.')
+    parser.add_argument('path', help='archivo CSV o NDJSON (por ejemplo, una exportación de /api/tasks/export)')
+    parser.add_argument('--format', choices=FORMATS, help='formato del archivo (por defecto, según la extensión)')
+    parser.add_argument('--user', help='propietario de todas las tareas (si no, la columna created_by_username)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='tareas por lote (y transacción)')
+    parser.add_argument('--max-errors', type=int, default=0,
+                        help='filas inválidas que se omiten antes de detener la importación')
+    parser.add_argument('--create-users', action='store_true',
+                        help='crear los usuarios (propietarios y asignados) que no existan')
+    parser.add_argument('--dry-run', action='store_true', help='validar el archivo sin importar nada')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size debe ser al menos 1')
+
+    conn = psycopg2.connect(get_database_url())
+    importer = TaskImporter(conn, batch_size=args.batch_size, max_errors=args.max_errors,
+                            create_users=args.create_users, dry_run=args.dry_run)
+    start = time.perf_counter()
+    try:
+        for line, record in read_records(args.path, args.format or detect_format(args.path)):
+            importer.add(line, record, owner=args.user)
+        importer.flush()
+    except ImportStopped as e:
+        print(f'Importación detenida en la línea {e}: demasiadas filas inválidas.', file=sys.stderr)
+        if importer.last_committed_line:
+            print(f'Ya se importaron las tareas hasta la línea {importer.last_committed_line} '
+                  f'({importer.imported} tareas).', file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    if args.dry_run:
+        print(f'Archivo válido: {importer.imported} tareas y {importer.assignments} asignaciones '
+              f'({importer.errors} filas inválidas).')
+        return 0
+    print(f'{importer.imported} tareas y {importer.assignments} asignaciones importadas en {elapsed:.1f}s '
+          f'({importer.imported / elapsed if elapsed else 0:.0f} tareas/s, {importer.created_users} usuarios '
+          f'creados, {importer.errors} filas omitidas).')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,31 @@
 # init_db.py
-from app import app, init_db
+# Comprueba el esquema de la base de datos antes de arrancar gunicorn
+# (start.sh) y aplica las migraciones pendientes (ver migrate.py). No borra
+# datos: en una base de datos vacía crea el esquema completo y en una
+# existente solo aplica lo que falte. Solo importa migrate.py, no la
+# aplicación, así que con el esquema al día termina en lo que tarda una consulta.
+import psycopg2
 
-# Ejecuta la función init_db() dentro del contexto de la aplicación Flask
-# Esto asegurará que get_db() funcione correctamente para conectar a la DB.
-with app.app_context():
-    print("Iniciando la inicialización de la base de datos...")
+from db import get_database_url
+from migrate import migrate
+
+print("Comprobando el esquema de la base de datos...")
+try:
+    conn = psycopg2.connect(get_database_url())
     try:
-        init_db()
-        print("Base de datos inicializada exitosamente.")
-    except Exception as e:
-        print(f"Error durante la inicialización de la base de datos: {e}")
-        # En un entorno de producción, podrías querer levantar el error
-        # para que el despliegue falle si la DB no se inicializa.
-        # raise # Descomentar para hacer que el despliegue falle en caso de error de DB
\ No newline at end of file
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    if applied:
+        # Las cachés de los workers ya en marcha se invalidan a través de Redis
+        # (si está configurado); los que arrancan después empiezan vacíos.
+        from cache import UserDirectory
+        UserDirectory(loader=None).invalidate()
+        print("Migraciones aplicadas: %s" % ', '.join(applied))
+    else:
+        print("El esquema de la base de datos está al día.")
+except Exception as e:
+    print(f"Error durante la inicialización de la base de datos: {e}")
+    # En un entorno de producción, podrías querer levantar el error
+    # para que el despliegue falle si la DB no se inicializa.
+    # raise # Descomentar para hacer que el despliegue falle en caso de error de DB
@@ -0,0 +1,340 @@
+# jobs.py
+# Cola de trabajos en segundo plano sobre PostgreSQL (tabla jobs).
+#
+# Las rutas encolan con enqueue() en la misma transacción que su escritura:
+# el trabajo existe solo si la escritura se confirma, y un NOTIFY despierta a
+# los workers (worker.py) en ese momento. Cada worker toma lotes de trabajos
+# listos con FOR UPDATE SKIP LOCKED, así que varios workers no se esperan ni
+# toman el mismo trabajo. Cada trabajo se ejecuta en su propia transacción,
+# que también lo marca como terminado: lo que escribe el manejador y el
+# "done" se confirman juntos. Si el manejador devuelve una función, se llama
+# después de confirmar (para avisar a otros procesos de lo que escribió).
+#
+# Un manejador que lanza una excepción se reintenta con espera exponencial
+# (JOBS_RETRY_BASE_DELAY, hasta JOBS_RETRY_MAX_DELAY) hasta max_attempts
+# veces; después queda como 'failed'. Los trabajos de un worker que muere a
+# medias vuelven a la cola pasados JOBS_LOCK_TIMEOUT segundos.
+import json
+import logging
+import os
+import random
+import select
+import socket
+import time
+from datetime import datetime, timezone
+
+import psycopg2.extras
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'jobs_ready'
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = float(os.environ.get('JOBS_RETRY_BASE_DELAY', 10))
+RETRY_MAX_DELAY = float(os.environ.get('JOBS_RETRY_MAX_DELAY', 3600))
+LOCK_TIMEOUT = float(os.environ.get('JOBS_LOCK_TIMEOUT', 600))
+# Los trabajos terminados se guardan este tiempo (métricas y claves de deduplicación).
+RETENTION_DAYS = float(os.environ.get('JOBS_RETENTION_DAYS', 7))
+MAX_ERROR_LENGTH = 2000
+
+
+class JobHandler:
+    def __init__(self, kind, func, max_attempts=DEFAULT_MAX_ATTEMPTS, every=None):
+        self.kind = kind
+        self.func = func
+        self.max_attempts = max_attempts
+        # Segundos entre ejecuciones de los trabajos periódicos (None: solo cuando se encolan).
+        self.every = every
+
+
+# kind -> JobHandler. Los manejadores se registran con @job al importar su módulo (task_jobs.py).
+handlers = {}
+
+
+def job(kind, max_attempts=DEFAULT_MAX_ATTEMPTS, every=None):
+    def register(func):
+        handlers[kind] = JobHandler(kind, func, max_attempts, every)
+        return func
+    return register
+
+
+def enqueue(cursor, kind, payload=None, run_at=None, dedupe_key=None, max_attempts=None):
+    # Encola un trabajo en la transacción del cursor. Devuelve su id, o None si
+    # ya existía uno del mismo tipo con la misma dedupe_key.
+    ids = enqueue_many(cursor, kind, [(payload, run_at, dedupe_key)], max_attempts)
+    return ids[0] if ids else None
+
+
+def enqueue_many(cursor, kind, jobs, max_attempts=None):
+    # jobs: [(payload, run_at o None, dedupe_key o None)], con un solo INSERT.
+    if not jobs:
+        return []
+    if max_attempts is None:
+        handler = handlers.get(kind)
+        max_attempts = handler.max_attempts if handler else DEFAULT_MAX_ATTEMPTS
+    rows = [(kind, json.dumps(payload or {}), run_at, dedupe_key, max_attempts)
+            for payload, run_at, dedupe_key in jobs]
+    created = psycopg2.extras.execute_values(cursor, """
+        INSERT INTO jobs (kind, payload, run_at, dedupe_key, max_attempts)
+        SELECT v.kind, v.payload::jsonb, COALESCE(v.run_at::timestamptz, now()), v.dedupe_key, v.max_attempts
+        FROM (VALUES %s) AS v (kind, payload, run_at, dedupe_key, max_attempts)
+        ON CONFLICT (kind, dedupe_key) WHERE dedupe_key IS NOT NULL DO NOTHING
+        RETURNING id
+    """, rows, page_size=1000, fetch=True)
+    if created:
+        # Se entrega al confirmar la transacción; los trabajos programados para
+        # más tarde los recoge el sondeo periódico del worker.
+        cursor.execute('SELECT pg_notify(%s, %s)', (CHANNEL, kind))
+    return [row[0] for row in created]
+
+
+def retry_delay(attempts):
+    # Espera antes del siguiente intento: exponencial, con un reparto aleatorio
+    # para que los trabajos que fallaron juntos no se reintenten a la vez.
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def worker_name():
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+
+def claim(conn, limit, worker=None):
+    # Toma hasta limit trabajos listos y los marca como 'running'.
+    # Devuelve [(id, kind, payload, attempts, max_attempts)].
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = now(), locked_by = %s
+            WHERE id IN (
+                SELECT id FROM jobs
+                WHERE status = 'queued' AND run_at <= now()
+                ORDER BY run_at, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, kind, payload, attempts, max_attempts
+        """, (worker or worker_name(), limit))
+        claimed = [tuple(row) for row in cursor.fetchall()]
+    conn.commit()
+    claimed.sort(key=lambda row: row[0])
+    return claimed
+
+
+def _finish(cursor, job_id):
+    cursor.execute("UPDATE jobs SET status = 'done', finished_at = now(), last_error = NULL WHERE id = %s",
+                   (job_id,))
+
+
+def _fail(conn, job_id, attempts, max_attempts, error):
+    error = error[:MAX_ERROR_LENGTH]
+    with conn.cursor() as cursor:
+        if attempts < max_attempts:
+            cursor.execute("""
+                UPDATE jobs SET status = 'queued', run_at = now() + %s * interval '1 second',
+                                last_error = %s, locked_by = NULL
+                WHERE id = %s
+            """, (retry_delay(attempts), error, job_id))
+        else:
+            cursor.execute("UPDATE jobs SET status = 'failed', finished_at = now(), last_error = %s WHERE id = %s",
+                           (error, job_id))
+    conn.commit()
+    return attempts < max_attempts
+
+
+def run_job(conn, job_id, kind, payload, attempts, max_attempts):
+    # Ejecuta un trabajo ya tomado con claim(). Devuelve 'done', 'retry' o 'failed'.
+    handler = handlers.get(kind)
+    try:
+        if handler is None:
+            raise LookupError('Tipo de trabajo desconocido: %s' % kind)
+        with conn.cursor() as cursor:
+            after_commit = handler.func(cursor, payload)
+            _finish(cursor, job_id)
+        conn.commit()
+    except Exception as e:
+        if conn.closed:
+            # Se perdió la conexión: no se puede anotar el fallo. El trabajo (y el
+            # resto del lote) vuelve a la cola con requeue_stale(), y Worker.run()
+            # se reconecta.
+            raise
+        conn.rollback()
+        retried = _fail(conn, job_id, attempts, max_attempts, '%s: %s' % (type(e).__name__, e))
+        logger.warning('Trabajo %s (%s) falló en el intento %d de %d: %s', job_id, kind, attempts, max_attempts,
+                       e, exc_info=not retried)
+        return 'retry' if retried else 'failed'
+    if callable(after_commit):
+        try:
+            after_commit()
+        except Exception:
+            logger.exception('Trabajo %s (%s): error después de confirmar', job_id, kind)
+    return 'done'
+
+
+def requeue_stale(conn, timeout=LOCK_TIMEOUT):
+    # Devuelve a la cola los trabajos 'running' de workers que murieron sin
+    # terminarlos. El intento ya está contado: un trabajo que tumba al worker
+    # acaba como 'failed' tras max_attempts.
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE jobs
+            SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END,
+                last_error = 'Sin terminar por ' || COALESCE(locked_by, '?'), locked_by = NULL
+            WHERE status = 'running' AND started_at < now() - %s * interval '1 second'
+        """, (timeout,))
+        count = cursor.rowcount
+    conn.commit()
+    return count
+
+
+def next_run(every, now=None):
+    # Siguiente múltiplo de "every" segundos: todos los workers calculan el
+    # mismo instante, y la dedupe_key evita que lo encolen varias veces.
+    now = now or datetime.now(timezone.utc)
+    slot = int(now.timestamp() // every) + 1
+    return datetime.fromtimestamp(slot * every, timezone.utc), slot
+
+
+def schedule_periodic(conn):
+    # Encola la próxima ejecución de cada trabajo periódico (si no lo está ya).
+    scheduled = 0
+    with conn.cursor() as cursor:
+        for handler in handlers.values():
+            if handler.every:
+                run_at, slot = next_run(handler.every)
+                if enqueue(cursor, handler.kind, {}, run_at=run_at, dedupe_key='every:%d' % slot) is not None:
+                    scheduled += 1
+    conn.commit()
+    return scheduled
+
+
+def purge(cursor, retention_days=RETENTION_DAYS, batch_size=10000):
+    # Borra los trabajos terminados hace más de retention_days, por lotes.
+    deleted = 0
+    while True:
+        cursor.execute("""
+            DELETE FROM jobs WHERE id IN (
+                SELECT id FROM jobs
+                WHERE status IN ('done', 'failed') AND finished_at < now() - %s * interval '1 day'
+                LIMIT %s
+            )
+        """, (retention_days, batch_size))
+        deleted += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return deleted
+
+
+def queue_stats(cursor, window_seconds=300):
+    # Estado de la cola para /metrics y /_stats: trabajos por tipo y estado
+    # (los 'queued' separados en listos y programados), antigüedad del trabajo
+    # listo más antiguo y terminados en los últimos window_seconds.
+    cursor.execute("""
+        SELECT kind,
+               CASE WHEN status = 'queued' AND run_at > now() THEN 'scheduled' ELSE status END AS state,
+               count(*) AS count,
+               COALESCE(EXTRACT(EPOCH FROM now() - min(run_at) FILTER (WHERE status = 'queued')), 0) AS oldest
+        FROM jobs WHERE status IN ('queued', 'running')
+        GROUP BY 1, 2
+    """)
+    backlog = {}
+    oldest = {}
+    for kind, state, count, oldest_seconds in cursor.fetchall():
+        backlog.setdefault(kind, {})[state] = count
+        if state == 'queued':
+            oldest[kind] = float(oldest_seconds)
+    cursor.execute("""
+        SELECT kind, status, count(*), COALESCE(avg(EXTRACT(EPOCH FROM finished_at - started_at)), 0)
+        FROM jobs
+        WHERE status IN ('done', 'failed') AND finished_at > now() - %s * interval '1 second'
+        GROUP BY 1, 2
+    """, (window_seconds,))
+    finished = {}
+    for kind, status, count, seconds in cursor.fetchall():
+        finished.setdefault(kind, {})[status] = {'count': count, 'avg_seconds': float(seconds)}
+    return {'backlog': backlog, 'oldest_ready_seconds': oldest, 'finished': finished,
+            'window_seconds': window_seconds}
+
+
+class Worker:
+    # Bucle de un proceso worker (ver worker.py): toma lotes de trabajos
+    # listos, los ejecuta y, si no hay ninguno, espera un NOTIFY de enqueue()
+    # o como mucho poll_interval segundos (los trabajos programados para más
+    # tarde no avisan).
+    def __init__(self, dsn, batch_size=10, poll_interval=5.0, maintenance_interval=60.0):
+        self.dsn = dsn
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        self.name = worker_name()
+        self.conn = None
+        self.listen_conn = None
+        self.stopping = False
+        self.results = {'done': 0, 'retry': 0, 'failed': 0}
+        self._next_maintenance = 0.0
+
+    def connect(self):
+        self.conn = psycopg2.connect(self.dsn)
+        self.listen_conn = psycopg2.connect(self.dsn)
+        self.listen_conn.autocommit = True
+        with self.listen_conn.cursor() as cursor:
+            cursor.execute('LISTEN %s' % CHANNEL)
+
+    def close(self):
+        for conn in (self.conn, self.listen_conn):
+            if conn is not None and not conn.closed:
+                conn.close()
+
+    def maintenance(self):
+        # Trabajos periódicos y recuperación de trabajos abandonados, como
+        # mucho una vez cada maintenance_interval segundos por worker.
+        if time.monotonic() < self._next_maintenance:
+            return
+        self._next_maintenance = time.monotonic() + self.maintenance_interval
+        schedule_periodic(self.conn)
+        stale = requeue_stale(self.conn)
+        if stale:
+            logger.warning('%d trabajos abandonados devueltos a la cola', stale)
+
+    def run_once(self):
+        # Ejecuta un lote; devuelve cuántos trabajos había.
+        self.maintenance()
+        claimed = claim(self.conn, self.batch_size, self.name)
+        for job_id, kind, payload, attempts, max_attempts in claimed:
+            start = time.perf_counter()
+            result = run_job(self.conn, job_id, kind, payload, attempts, max_attempts)
+            self.results[result] += 1
+            logger.info('Trabajo %s (%s): %s en %.3fs', job_id, kind, result, time.perf_counter() - start)
+        return len(claimed)
+
+    def wait(self):
+        # select() con gevent cede el control, como en events.py.
+        select.select([self.listen_conn], [], [], self.poll_interval)
+        self.listen_conn.poll()
+        del self.listen_conn.notifies[:]
+
+    def sleep(self, seconds):
+        # Espera interrumpible por stopping (la señal no corta time.sleep()).
+        deadline = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < deadline:
+            time.sleep(min(0.5, deadline - time.monotonic()))
+
+    def run(self):
+        logger.info('Worker %s esperando trabajos (%s)', self.name, ', '.join(sorted(handlers)) or '-')
+        backoff = 1.0
+        try:
+            while not self.stopping:
+                try:
+                    self.connect()
+                    backoff = 1.0
+                    while not self.stopping:
+                        if not self.run_once() and not self.stopping:
+                            self.wait()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Se reconecta como el hilo de events.py; los trabajos del lote
+                    # interrumpido vuelven a la cola con requeue_stale().
+                    logger.exception('Conexión con la base de datos perdida; reconectando en %.0fs', backoff)
+                    self.close()
+                    self.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+        finally:
+            self.close()
+        logger.info('Worker %s detenido: %s', self.name, self.results)
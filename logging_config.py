@@ -0,0 +1,173 @@
+# logging_config.py
+# Configuración de logging de la aplicación.
+#
+# - Nivel con LOG_LEVEL (INFO por defecto) y formato texto o JSON (LOG_FORMAT=json).
+# - Cada registro lleva el id de la petición (cabecera X-Request-ID o uno nuevo).
+# - Los mensajes DEBUG solo se emiten para una muestra de las peticiones
+#   (LOG_DEBUG_SAMPLE_RATE, de 0 a 1), para poder activarlos en producción.
+# - Los registros se encolan (QueueHandler) y un hilo aparte los escribe, de
+#   modo que las peticiones nunca esperan a la escritura en stderr.
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+
+from flask import g, has_request_context, request
+
+# Atributos estándar de LogRecord; el resto son campos "extra" del registro.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_settings = {
+    'level': 'INFO',
+    'debug_sample_rate': 0.0,
+}
+_level_number = logging.INFO
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+def _request_sampled():
+    return has_request_context() and g.get('debug_sampled', False)
+
+
+class RequestContextFilter(logging.Filter):
+    # Añade request_id al registro y descarta lo que esté por debajo del nivel
+    # configurado salvo en las peticiones muestreadas.
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return record.levelno >= _level_number or _request_sampled()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + '.%03dZ' % record.msecs,
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'request_id': getattr(record, 'request_id', '-'),
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _make_formatter():
+    if os.environ.get('LOG_FORMAT', 'text') == 'json':
+        return JsonFormatter()
+    return logging.Formatter('%(asctime)s %(levelname)s [%(process)d] [%(request_id)s] %(name)s: %(message)s')
+
+
+def _start_listener():
+    global _listener, _queue_handler
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_make_formatter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    root.addHandler(handler)
+    _queue_handler = handler
+
+
+def set_log_level(level=None, debug_sample_rate=None):
+    # Cambia en caliente el nivel y/o la fracción de peticiones con DEBUG (solo en este proceso).
+    # Se validan los dos valores antes de aplicar ninguno: un valor inválido no
+    # deja la configuración cambiada a medias.
+    global _level_number
+    if level is not None:
+        level = str(level).upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError('Nivel de log desconocido: %s' % level)
+    if debug_sample_rate is not None:
+        try:
+            debug_sample_rate = float(debug_sample_rate)
+        except (TypeError, ValueError):
+            raise ValueError('LOG_DEBUG_SAMPLE_RATE debe ser un número entre 0 y 1') from None
+        if not 0.0 <= debug_sample_rate <= 1.0:
+            raise ValueError('LOG_DEBUG_SAMPLE_RATE debe estar entre 0 y 1')
+    with _lock:
+        if level is not None:
+            _settings['level'] = level
+            _level_number = logging.getLevelName(level)
+        if debug_sample_rate is not None:
+            _settings['debug_sample_rate'] = debug_sample_rate
+        # Con muestreo activo el logger raíz debe dejar pasar DEBUG; el filtro
+        # se encarga de descartar las peticiones no muestreadas.
+        effective = _settings['level']
+        if _settings['debug_sample_rate'] > 0:
+            effective = 'DEBUG'
+        logging.getLogger().setLevel(effective)
+        return dict(_settings)
+
+
+def get_log_settings():
+    return dict(_settings)
+
+
+def debug_enabled():
+    # Para evitar construir mensajes DEBUG costosos cuando no se van a emitir.
+    return _level_number <= logging.DEBUG or _request_sampled()
+
+
+def configure_logging(app=None):
+    # Sin app (worker.py) solo se configura la salida; no hay peticiones.
+    with _lock:
+        if _listener is None:
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            _start_listener()
+    set_log_level(os.environ.get('LOG_LEVEL', 'INFO'), os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0))
+    if app is None:
+        return
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID', '')[:128] or uuid.uuid4().hex
+        rate = _settings['debug_sample_rate']
+        g.debug_sampled = rate > 0 and random.random() < rate
+
+    @app.after_request
+    def add_request_id_header(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
+
+
+@atexit.register
+def _flush_on_exit():
+    # Escribir lo que quede en la cola antes de terminar el proceso.
+    if _listener is not None:
+        _listener.stop()
+
+
+def _after_fork_in_child():
+    # El hilo que escribe los logs no sobrevive a fork(): se arranca otro.
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
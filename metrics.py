@@ -0,0 +1,246 @@
+# metrics.py
+# Métricas del proceso en formato de texto de Prometheus: latencia por ruta,
+# número de consultas por petición y tiempo/filas por consulta (a través de
+# cursores de psycopg2 instrumentados), más un log de consultas lentas.
+#
+# Cada worker de gunicorn tiene sus propias métricas; /metrics devuelve las
+# del worker que atiende la petición (etiqueta "pid" en process_info).
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+import psycopg2.extensions
+import psycopg2.extras
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.environ.get('SLOW_QUERY_MS', 200)) / 1000.0
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value)) for name, value in pairs)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s counter' % self.name]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append('%s%s %s' % (self.name, _format_labels(self.labelnames, key), _format_value(value)))
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}  # etiquetas -> [cuentas por bucket, suma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][position] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s histogram' % self.name]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append('%s_bucket%s %d' % (self.name, _format_labels(self.labelnames, key, ('le', _format_value(float(bound)))), cumulative))
+                lines.append('%s_sum%s %s' % (self.name, _format_labels(self.labelnames, key), _format_value(total)))
+                lines.append('%s_count%s %d' % (self.name, _format_labels(self.labelnames, key), count))
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._gauges = []  # (nombre, ayuda, función -> [(etiquetas, valor)])
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, collect):
+        self._gauges.append((name, help, collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help, collect in self._gauges:
+            try:
+                samples = collect()
+            except Exception:
+                logger.exception('Error al recoger la métrica %s', name)
+                continue
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s gauge' % name)
+            for labels, value in samples:
+                label_text = _format_labels(tuple(labels), tuple(labels.values()))
+                lines.append('%s%s %s' % (name, label_text, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'Peticiones HTTP atendidas.', ('route', 'method', 'status'))
+http_latency = registry.histogram(
+    'http_request_duration_seconds', 'Duración de las peticiones HTTP (incluido el envío de respuestas por partes).',
+    ('route', 'method'))
+http_queries = registry.histogram(
+    'http_request_db_queries', 'Consultas a la base de datos por petición.', ('route',), COUNT_BUCKETS)
+db_queries = registry.counter(
+    'db_queries_total', 'Consultas ejecutadas.', ('route', 'query'))
+db_query_latency = registry.histogram(
+    'db_query_duration_seconds', 'Duración de cada consulta.', ('query',))
+db_query_rows = registry.histogram(
+    'db_query_rows', 'Filas devueltas o afectadas por cada consulta.', ('query',), ROW_BUCKETS)
+db_slow_queries = registry.counter(
+    'db_slow_queries_total', 'Consultas que superan SLOW_QUERY_MS.', ('route', 'query'))
+
+
+def current_route():
+    if not has_request_context():
+        return 'background'
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+_VALUES_LIST = re.compile(r'\bVALUES\s*\(.*', re.IGNORECASE | re.DOTALL)
+
+
+def query_label(query):
+    # Etiqueta estable y corta para una consulta: espacios colapsados, sin la
+    # lista de valores de los INSERT de varias filas (execute_values) y, si es
+    # larga, recortada con una huella del texto completo para no mezclar
+    # consultas que empiezan igual.
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    query = ' '.join(str(query).split())
+    query = _VALUES_LIST.sub('VALUES …', query)
+    if len(query) <= 120:
+        return query
+    return '%s… #%s' % (query[:100], hashlib.sha1(query.encode()).hexdigest()[:8])
+
+
+def record_query(query, elapsed, rowcount):
+    label = query_label(query)
+    route = current_route()
+    db_queries.inc(route=route, query=label)
+    db_query_latency.observe(elapsed, query=label)
+    if rowcount is not None and rowcount >= 0:
+        db_query_rows.observe(rowcount, query=label)
+    if has_request_context():
+        g._db_query_count = g.get('_db_query_count', 0) + 1
+    if elapsed >= SLOW_QUERY_SECONDS:
+        db_slow_queries.inc(route=route, query=label)
+        logger.warning('Consulta lenta: %.1f ms, %s filas, ruta %s: %s',
+                       elapsed * 1000, rowcount, route, label)
+
+
+class _InstrumentedMixin:
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - start, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - start, self.rowcount)
+
+
+class InstrumentedCursor(_InstrumentedMixin, psycopg2.extensions.cursor):
+    pass
+
+
+class InstrumentedDictCursor(_InstrumentedMixin, psycopg2.extras.DictCursor):
+    pass
+
+
+def install_request_metrics(app):
+    @app.before_request
+    def start_request_timer():
+        g._request_started = time.perf_counter()
+        g._db_query_count = 0
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('_request_started')
+        if started is None:
+            return response
+        route = current_route()
+        method = request.method
+        status = str(response.status_code)
+        request_g = g._get_current_object()
+
+        # Se registra al cerrar la respuesta, para incluir el tiempo de las
+        # respuestas enviadas por partes (stream_template).
+        def observe():
+            http_requests.inc(route=route, method=method, status=status)
+            http_latency.observe(time.perf_counter() - started, route=route, method=method)
+            http_queries.observe(request_g.get('_db_query_count', 0), route=route)
+
+        response.call_on_close(observe)
+        return response
@@ -0,0 +1,228 @@
+# migrate.py
+# Migraciones versionadas del esquema. Cada archivo migrations/NNN_nombre.sql
+# se aplica una sola vez, en orden, y queda registrado en schema_migrations;
+# los datos existentes no se tocan salvo lo que haga la propia migración.
+# Una base de datos vacía se crea directamente con schema.sql (el esquema
+# completo actual) y todas las migraciones se marcan como aplicadas.
+#
+#     python migrate.py            # aplica las migraciones pendientes
+#     python migrate.py --status   # lista las aplicadas y las pendientes
+#     python migrate.py --reset    # BORRA todas las tablas y crea el esquema (desarrollo)
+#
+# Cada migración se aplica en su propia transacción. Las que llevan la línea
+# "-- migrate: no-transaction" (CREATE INDEX CONCURRENTLY no admite
+# transacciones) se ejecutan sentencia a sentencia en modo autocommit, y por
+# eso deben poder repetirse sin error (IF NOT EXISTS) si fallan a medias.
+import argparse
+import logging
+import os
+import re
+import sys
+
+import psycopg2
+
+from db import get_database_url
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, 'migrations')
+SCHEMA_FILE = os.path.join(BASE_DIR, 'schema.sql')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_[\w-]+\.sql$')
+# Clave del bloqueo consultivo que impide que dos arranques simultáneos
+# (varias instancias de start.sh) apliquen las mismas migraciones a la vez.
+LOCK_KEY = 7314920551
+
+# Tablas que borra --reset, en orden de dependencia inversa.
+RESET_TABLES = ('schema_migrations', 'jobs', 'task_counters', 'task_set_versions', 'task_assignments', 'tasks', 'users')
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    @property
+    def transactional(self):
+        return NO_TRANSACTION_MARKER not in self.read()
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            migrations.append(Migration(match.group(1), filename[:-len('.sql')], os.path.join(directory, filename)))
+    versions = [migration.version for migration in migrations]
+    duplicated = sorted({version for version in versions if versions.count(version) > 1})
+    if duplicated:
+        raise RuntimeError('Versiones de migración repetidas: %s' % ', '.join(duplicated))
+    return migrations
+
+
+def split_statements(sql):
+    # Solo para migraciones sin transacción, que no contienen funciones: basta
+    # con quitar los comentarios de línea y separar por ';'.
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def _ensure_migrations_table(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+    conn.commit()
+
+
+def applied_versions(conn):
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT version FROM schema_migrations')
+        versions = {row[0] for row in cursor.fetchall()}
+    conn.commit()
+    return versions
+
+
+def _record(cursor, migration):
+    cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                   (migration.version, migration.name))
+
+
+def _is_empty_database(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('tasks') IS NULL AND to_regclass('users') IS NULL")
+        empty = cursor.fetchone()[0]
+    conn.commit()
+    return empty
+
+
+def _create_schema(conn, migrations):
+    # Base de datos vacía: schema.sql ya incluye el resultado de todas las migraciones.
+    with open(SCHEMA_FILE) as f:
+        schema = f.read()
+    with conn.cursor() as cursor:
+        # El script se ejecuta de una vez: las funciones de los triggers
+        # contienen ';' y no se pueden separar en sentencias sueltas.
+        cursor.execute(schema)
+        for migration in migrations:
+            _record(cursor, migration)
+    conn.commit()
+
+
+def _apply(conn, migration):
+    sql = migration.read()
+    if migration.transactional:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+            _record(cursor, migration)
+        conn.commit()
+        return
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for statement in split_statements(sql):
+                cursor.execute(statement)
+            _record(cursor, migration)
+    finally:
+        conn.autocommit = False
+
+
+def pending_migrations(conn, migrations):
+    # Migraciones sin aplicar, con una sola consulta de lectura y sin bloqueo:
+    # es todo lo que hace un arranque con el esquema al día.
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        registered = cursor.fetchone()[0]
+    conn.commit()
+    if not registered:
+        return list(migrations)
+    done = applied_versions(conn)
+    return [migration for migration in migrations if migration.version not in done]
+
+
+def migrate(conn, migrations=None):
+    # Aplica las migraciones pendientes y devuelve los nombres de las aplicadas
+    # (o ['schema.sql'] si la base de datos estaba vacía).
+    migrations = load_migrations() if migrations is None else migrations
+    if not pending_migrations(conn, migrations):
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', (LOCK_KEY,))
+    conn.commit()
+    try:
+        if _is_empty_database(conn):
+            _ensure_migrations_table(conn)
+            _create_schema(conn, migrations)
+            logger.info('Esquema creado desde schema.sql (%d migraciones marcadas como aplicadas)', len(migrations))
+            return ['schema.sql']
+        # Bases de datos anteriores al registro de migraciones: se aplican todas,
+        # y las ya aplicadas a mano con psql no hacen nada (son idempotentes).
+        _ensure_migrations_table(conn)
+        done = applied_versions(conn)
+        applied = []
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            logger.info('Aplicando migración %s', migration.name)
+            _apply(conn, migration)
+            applied.append(migration.name)
+        return applied
+    finally:
+        # Si una migración ha fallado, su transacción se deshace entera.
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (LOCK_KEY,))
+        conn.commit()
+
+
+def reset(conn):
+    with conn.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS %s CASCADE' % ', '.join(RESET_TABLES))
+    conn.commit()
+
+
+def print_status(conn):
+    _ensure_migrations_table(conn)
+    done = applied_versions(conn)
+    for migration in load_migrations():
+        print('%s %s' % ('[x]' if migration.version in done else '[ ]', migration.name))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aplica las migraciones pendientes del esquema.')
+    parser.add_argument('--status', action='store_true', help='listar las migraciones aplicadas y pendientes')
+    parser.add_argument('--reset', action='store_true',
+                        help='borrar todas las tablas (y sus datos) antes de crear el esquema')
+    args = parser.parse_args(argv)
+
+    conn = psycopg2.connect(get_database_url())
+    try:
+        if args.status:
+            print_status(conn)
+            return 0
+        if args.reset:
+            reset(conn)
+            print('Tablas eliminadas.')
+        applied = migrate(conn)
+        if applied:
+            for name in applied:
+                print(f'Aplicada: {name}')
+        else:
+            print('El esquema está al día.')
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
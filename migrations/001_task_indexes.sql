@@ -0,0 +1,22 @@
+-- migrations/001_task_indexes.sql
+-- Índices secundarios para la lista "Mis Tareas" y los filtros de index().
+-- Se crean con CONCURRENTLY para no bloquear escrituras en una base de datos
+-- con datos; CONCURRENTLY no puede ejecutarse dentro de una transacción, así
+-- que migrate.py aplica este archivo sentencia a sentencia en modo autocommit.
+--
+-- migrate: no-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_created_by
+    ON tasks (created_by, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_created_by_status
+    ON tasks (created_by, status, due_date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_pending_due_date
+    ON tasks (due_date) WHERE status = 'pending';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_assignments_user
+    ON task_assignments (user_id, task_id);
+
+ANALYZE tasks;
+ANALYZE task_assignments;
@@ -0,0 +1,8 @@
+-- migrations/002_task_set_versions.sql
+-- Versión del conjunto de tareas de cada usuario, usada como ETag por /api/tasks.
+-- Se aplica con python migrate.py.
+
+CREATE TABLE IF NOT EXISTS task_set_versions (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,97 @@
+-- migrations/003_task_counters.sql
+-- Contadores de tareas por usuario (resumen del panel) mantenidos por triggers,
+-- y carga inicial a partir de las tareas existentes. La carga bloquea las
+-- escrituras en tasks y task_assignments mientras dura. Se aplica con
+-- python migrate.py, en una sola transacción.
+
+CREATE TABLE IF NOT EXISTS task_counters (
+    -- Sin clave foránea: al borrar un usuario, los borrados en cascada de sus
+    -- tareas y asignaciones dejan sus contadores a cero antes de desaparecer él.
+    user_id INTEGER NOT NULL,
+    scope TEXT NOT NULL, -- 'created' (tareas creadas por el usuario) o 'assigned' (asignadas a él)
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, scope, status, priority)
+);
+
+-- Suma delta al contador (los decrementos solo actualizan filas existentes).
+CREATE OR REPLACE FUNCTION task_counters_add(p_user_id INTEGER, p_scope TEXT, p_status TEXT, p_priority TEXT, p_delta INTEGER)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_delta > 0 THEN
+        INSERT INTO task_counters (user_id, scope, status, priority, count)
+        VALUES (p_user_id, p_scope, p_status, p_priority, p_delta)
+        ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + p_delta;
+    ELSE
+        UPDATE task_counters SET count = count + p_delta
+        WHERE user_id = p_user_id AND scope = p_scope AND status = p_status AND priority = p_priority;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION task_counters_on_task() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM task_counters_add(NEW.created_by, 'created', NEW.status, NEW.priority, 1);
+        RETURN NEW;
+    ELSIF TG_OP = 'DELETE' THEN
+        -- BEFORE DELETE: las asignaciones que se borrarán en cascada aún existen.
+        PERFORM task_counters_add(OLD.created_by, 'created', OLD.status, OLD.priority, -1);
+        PERFORM task_counters_add(a.user_id, 'assigned', OLD.status, OLD.priority, -1)
+        FROM task_assignments a WHERE a.task_id = OLD.id;
+        RETURN OLD;
+    END IF;
+    -- UPDATE de estado, prioridad o creador
+    PERFORM task_counters_add(OLD.created_by, 'created', OLD.status, OLD.priority, -1);
+    PERFORM task_counters_add(NEW.created_by, 'created', NEW.status, NEW.priority, 1);
+    IF OLD.status IS DISTINCT FROM NEW.status OR OLD.priority IS DISTINCT FROM NEW.priority THEN
+        PERFORM task_counters_add(a.user_id, 'assigned', OLD.status, OLD.priority, -1)
+        FROM task_assignments a WHERE a.task_id = NEW.id;
+        PERFORM task_counters_add(a.user_id, 'assigned', NEW.status, NEW.priority, 1)
+        FROM task_assignments a WHERE a.task_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION task_counters_on_assignment() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    task RECORD;
+BEGIN
+    SELECT status, priority INTO task FROM tasks WHERE id = COALESCE(NEW.task_id, OLD.task_id);
+    -- Sin tarea: se está borrando y su trigger ya descontó las asignaciones.
+    IF FOUND THEN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM task_counters_add(NEW.user_id, 'assigned', task.status, task.priority, 1);
+        ELSE
+            PERFORM task_counters_add(OLD.user_id, 'assigned', task.status, task.priority, -1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tasks_counters_insert ON tasks;
+CREATE TRIGGER tasks_counters_insert AFTER INSERT ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_task();
+DROP TRIGGER IF EXISTS tasks_counters_update ON tasks;
+CREATE TRIGGER tasks_counters_update AFTER UPDATE OF status, priority, created_by ON tasks
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.priority IS DISTINCT FROM NEW.priority
+          OR OLD.created_by IS DISTINCT FROM NEW.created_by)
+    EXECUTE FUNCTION task_counters_on_task();
+DROP TRIGGER IF EXISTS tasks_counters_delete ON tasks;
+CREATE TRIGGER tasks_counters_delete BEFORE DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_task();
+DROP TRIGGER IF EXISTS task_assignments_counters ON task_assignments;
+CREATE TRIGGER task_assignments_counters AFTER INSERT OR DELETE ON task_assignments
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_assignment();
+
+LOCK TABLE tasks, task_assignments IN SHARE MODE;
+DELETE FROM task_counters;
+INSERT INTO task_counters (user_id, scope, status, priority, count)
+SELECT created_by, 'created', status, priority, count(*) FROM tasks GROUP BY 1, 2, 3, 4
+UNION ALL
+SELECT a.user_id, 'assigned', t.status, t.priority, count(*)
+FROM task_assignments a JOIN tasks t ON t.id = a.task_id GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,95 @@
+-- migrations/004_typed_columns.sql
+-- Tipos nativos en tasks, para que filtros y órdenes usen los índices y
+-- comparen valores simples en lugar de texto:
+--   due_date   TEXT    -> DATE (las fechas ilegibles quedan en NULL)
+--   priority   TEXT    -> SMALLINT: 1 Baja, 2 Media, 3 Alta (desconocidas -> 1)
+--   is_public  INTEGER -> BOOLEAN
+--   status     TEXT con CHECK: 'pending' o 'completed' (desconocidos -> 'pending')
+-- task_counters.priority pasa también a SMALLINT y los contadores se recalculan;
+-- los de un usuario se borran con él.
+--
+-- Reescribe la tabla tasks con un bloqueo exclusivo: en tablas grandes,
+-- aplicar con la aplicación parada o en un momento de poca actividad.
+-- Se aplica con python migrate.py, en una sola transacción.
+
+-- El trigger de actualización nombra las columnas status y priority, que no
+-- pueden cambiar de tipo mientras exista.
+DROP TRIGGER IF EXISTS tasks_counters_update ON tasks;
+
+CREATE FUNCTION pg_temp.date_or_null(value TEXT) RETURNS DATE LANGUAGE plpgsql AS $$
+BEGIN
+    RETURN NULLIF(btrim(value), '')::date;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$;
+
+UPDATE tasks SET status = 'pending' WHERE status NOT IN ('pending', 'completed');
+
+ALTER TABLE tasks
+    ALTER COLUMN due_date TYPE DATE USING pg_temp.date_or_null(due_date),
+    ALTER COLUMN priority DROP DEFAULT,
+    ALTER COLUMN priority TYPE SMALLINT
+        USING CASE priority WHEN 'Alta' THEN 3 WHEN 'Media' THEN 2 ELSE 1 END,
+    ALTER COLUMN priority SET DEFAULT 1,
+    ALTER COLUMN is_public DROP DEFAULT,
+    ALTER COLUMN is_public TYPE BOOLEAN USING is_public <> 0,
+    ALTER COLUMN is_public SET DEFAULT FALSE,
+    ADD CONSTRAINT tasks_status_check CHECK (status IN ('pending', 'completed')),
+    ADD CONSTRAINT tasks_priority_check CHECK (priority BETWEEN 1 AND 3);
+
+-- Órdenes por prioridad de la lista pública de un usuario (y desempate por id).
+CREATE INDEX idx_tasks_created_by_priority ON tasks (created_by, priority, id);
+
+-- Nombre de cada código de prioridad (el mismo orden que TASK_PRIORITIES en app.py).
+CREATE OR REPLACE FUNCTION task_priority_name(p_priority SMALLINT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT (ARRAY['Baja', 'Media', 'Alta'])[p_priority]
+$$;
+
+-- Contadores: la prioridad pasa a SMALLINT y se recalculan desde cero.
+DELETE FROM task_counters;
+ALTER TABLE task_counters ALTER COLUMN priority TYPE SMALLINT USING 1;
+
+DROP FUNCTION IF EXISTS task_counters_add(INTEGER, TEXT, TEXT, TEXT, INTEGER);
+CREATE OR REPLACE FUNCTION task_counters_add(p_user_id INTEGER, p_scope TEXT, p_status TEXT, p_priority SMALLINT, p_delta INTEGER)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_delta > 0 THEN
+        INSERT INTO task_counters (user_id, scope, status, priority, count)
+        VALUES (p_user_id, p_scope, p_status, p_priority, p_delta)
+        ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + p_delta;
+    ELSE
+        UPDATE task_counters SET count = count + p_delta
+        WHERE user_id = p_user_id AND scope = p_scope AND status = p_status AND priority = p_priority;
+    END IF;
+END;
+$$;
+
+CREATE TRIGGER tasks_counters_update AFTER UPDATE OF status, priority, created_by ON tasks
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.priority IS DISTINCT FROM NEW.priority
+          OR OLD.created_by IS DISTINCT FROM NEW.created_by)
+    EXECUTE FUNCTION task_counters_on_task();
+
+-- Al borrar varios usuarios a la vez, las asignaciones entre ellos pueden
+-- desaparecer en cascada sin descontarse; sus contadores se borran con ellos.
+CREATE OR REPLACE FUNCTION task_counters_on_user_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM task_counters WHERE user_id = OLD.id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS users_counters_delete ON users;
+CREATE TRIGGER users_counters_delete AFTER DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_user_delete();
+
+LOCK TABLE task_assignments IN SHARE MODE;
+INSERT INTO task_counters (user_id, scope, status, priority, count)
+SELECT created_by, 'created', status, priority, count(*) FROM tasks GROUP BY 1, 2, 3, 4
+UNION ALL
+SELECT a.user_id, 'assigned', t.status, t.priority, count(*)
+FROM task_assignments a JOIN tasks t ON t.id = a.task_id GROUP BY 1, 2, 3, 4;
+
+ANALYZE tasks;
@@ -0,0 +1,29 @@
+-- migrations/005_task_search.sql
+-- Búsqueda en las descripciones de las tareas (parámetro q de index() y
+-- /api/tasks): columna tsvector generada con la configuración 'spanish' e
+-- índice GIN para las palabras completas, e índice de trigramas (pg_trgm)
+-- para los fragmentos de palabra que busca ILIKE. Sin pg_trgm la búsqueda por
+-- fragmentos funciona igual, filtrando las tareas del usuario sin índice.
+--
+-- Añadir la columna reescribe la tabla tasks con un bloqueo exclusivo.
+-- Se aplica con python migrate.py, en una sola transacción.
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('spanish', task_description)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_tasks_search ON tasks USING GIN (search_vector);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        RAISE NOTICE 'pg_trgm no está disponible: la búsqueda por fragmentos no tendrá índice';
+        RETURN;
+    END IF;
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_tasks_description_trgm ON tasks USING GIN (task_description gin_trgm_ops);
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'Sin permiso para crear la extensión pg_trgm: la búsqueda por fragmentos no tendrá índice';
+END;
+$$;
+
+ANALYZE tasks;
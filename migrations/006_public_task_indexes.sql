@@ -0,0 +1,20 @@
+-- migrations/006_public_task_indexes.sql
+-- Índices parciales para la lista de tareas públicas de un usuario
+-- (view_shared_user_id): solo contienen las tareas públicas, así que son
+-- mucho más pequeños que los de todas las tareas y se recorren ya en el
+-- orden de la página (más recientes, por vencimiento y por prioridad).
+-- CONCURRENTLY no puede ejecutarse dentro de una transacción, así que
+-- migrate.py aplica este archivo sentencia a sentencia en modo autocommit.
+--
+-- migrate: no-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_public_recent
+    ON tasks (created_by, id DESC) WHERE is_public;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_public_due_date
+    ON tasks (created_by, due_date, id DESC) WHERE is_public;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_public_priority
+    ON tasks (created_by, priority DESC, id DESC) WHERE is_public;
+
+ANALYZE tasks;
@@ -0,0 +1,43 @@
+-- migrations/007_counter_statement_triggers.sql
+-- Los contadores de las tareas y asignaciones insertadas se suman una vez por
+-- sentencia, agrupando la tabla de transición con las filas nuevas, en lugar
+-- de una vez por fila. Con el trigger por fila, un COPY o un INSERT de miles
+-- de tareas actualizaba la misma fila de task_counters miles de veces en la
+-- misma transacción, y cada actualización tenía que saltar las versiones que
+-- dejaron las anteriores: el coste de un lote crecía con el cuadrado de su
+-- tamaño. Las actualizaciones y los borrados siguen contándose por fila.
+-- Se aplica con python migrate.py, en una sola transacción.
+
+CREATE OR REPLACE FUNCTION task_counters_on_tasks_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- Ordenado para bloquear las filas de contadores siempre en el mismo orden.
+    INSERT INTO task_counters (user_id, scope, status, priority, count)
+    SELECT created_by, 'created', status, priority, count(*) FROM new_tasks
+    GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+    ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION task_counters_on_assignments_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO task_counters (user_id, scope, status, priority, count)
+    SELECT a.user_id, 'assigned', t.status, t.priority, count(*)
+    FROM new_assignments a JOIN tasks t ON t.id = a.task_id
+    GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+    ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tasks_counters_insert ON tasks;
+CREATE TRIGGER tasks_counters_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counters_on_tasks_insert();
+
+DROP TRIGGER IF EXISTS task_assignments_counters ON task_assignments;
+CREATE TRIGGER task_assignments_counters_insert AFTER INSERT ON task_assignments
+    REFERENCING NEW TABLE AS new_assignments
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counters_on_assignments_insert();
+CREATE TRIGGER task_assignments_counters_delete AFTER DELETE ON task_assignments
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_assignment();
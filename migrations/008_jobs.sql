@@ -0,0 +1,35 @@
+-- migrations/008_jobs.sql
+-- Cola de trabajos en segundo plano (ver jobs.py y worker.py): las rutas
+-- encolan en la misma transacción que su escritura y los workers los toman
+-- con FOR UPDATE SKIP LOCKED, sin bloquearse entre ellos.
+-- También añade a tasks el resultado de la comprobación de la foto de tarea
+-- realizada, que hace un trabajo en lugar de la petición que guarda la URL.
+-- Se aplica con python migrate.py, en una sola transacción.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued'
+        CONSTRAINT jobs_status_check CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    run_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    -- Con clave, un mismo trabajo solo se encola una vez (hasta que se purga).
+    dedupe_key TEXT,
+    last_error TEXT,
+    locked_by TEXT,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Trabajos listos para ejecutarse, en orden.
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (run_at, id) WHERE status = 'queued';
+-- Trabajos en curso (para recuperar los de workers caídos) y terminados (purga y métricas).
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs (started_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at) WHERE status IN ('done', 'failed');
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (kind, dedupe_key) WHERE dedupe_key IS NOT NULL;
+
+-- Motivo por el que la foto de tarea realizada no es válida (NULL: válida o sin comprobar).
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS completed_photo_error TEXT;
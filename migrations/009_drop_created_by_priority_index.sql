@@ -0,0 +1,9 @@
+-- migrations/009_drop_created_by_priority_index.sql
+-- idx_tasks_created_by_priority (004) ya no lo usa ninguna consulta: la
+-- lista pública ordenada por prioridad recorre idx_tasks_public_priority
+-- (006), y la lista propia busca las tareas del usuario por
+-- idx_tasks_created_by. Solo añadía trabajo a cada escritura en tasks.
+--
+-- migrate: no-transaction
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_created_by_priority;
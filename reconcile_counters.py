@@ -0,0 +1,47 @@
+# reconcile_counters.py
+# Compara los contadores de task_counters con el recuento real de tareas y,
+# con --fix, los reconstruye desde cero. Útil tras cargas masivas hechas sin
+# triggers o para vigilar desviaciones periódicamente (cron):
+#
+#     python reconcile_counters.py          # código de salida 1 si hay desviaciones
+#     python reconcile_counters.py --fix
+import argparse
+import sys
+
+import psycopg2
+
+from counters import find_drift, rebuild
+from db import get_database_url
+
+MAX_REPORTED = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comprueba y reconstruye los contadores de tareas.')
+    parser.add_argument('--fix', action='store_true', help='reconstruir los contadores si hay desviaciones')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(get_database_url())
+    try:
+        with conn.cursor() as cursor:
+            drift = find_drift(cursor)
+            if not drift:
+                print('Contadores correctos.')
+                return 0
+            print(f'{len(drift)} contadores desviados (usuario, alcance, estado, prioridad: guardado -> real):')
+            for user_id, scope, status, priority, stored, actual in drift[:MAX_REPORTED]:
+                print(f'  {user_id}, {scope}, {status}, {priority}: {stored} -> {actual}')
+            if len(drift) > MAX_REPORTED:
+                print(f'  ... y {len(drift) - MAX_REPORTED} más')
+            if not args.fix:
+                return 1
+            rows = rebuild(cursor)
+        conn.commit()
+        print(f'Contadores reconstruidos ({rows} filas).')
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
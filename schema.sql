@@ -1,11 +1,7 @@
 -- schema.sql (ACTUALIZADO PARA PostgreSQL)
-
--- Primero, eliminar las tablas en orden de dependencia inversa
--- Esto es crucial porque 'task_assignments' depende de 'tasks' y 'users',
--- y 'tasks' depende de 'users'.
-DROP TABLE IF EXISTS task_assignments;
-DROP TABLE IF EXISTS tasks;
-DROP TABLE IF EXISTS users;
+-- Esquema completo actual, con todas las migraciones de migrations/ incluidas.
+-- migrate.py lo usa solo para crear una base de datos vacía; los cambios en
+-- bases de datos existentes se hacen con una nueva migración (y se reflejan aquí).
 
 CREATE TABLE users (
     id SERIAL PRIMARY KEY, -- SERIAL para autoincremento en PostgreSQL
@@ -16,15 +12,26 @@ CREATE TABLE users (
 CREATE TABLE tasks (
     id SERIAL PRIMARY KEY, -- SERIAL para autoincremento en PostgreSQL
     task_description TEXT NOT NULL,
-    status TEXT DEFAULT 'pending' NOT NULL,
-    due_date TEXT,
-    priority TEXT DEFAULT 'Baja' NOT NULL,
+    status TEXT DEFAULT 'pending' NOT NULL CONSTRAINT tasks_status_check CHECK (status IN ('pending', 'completed')),
+    due_date DATE,
+    -- 1 Baja, 2 Media, 3 Alta (ver task_priority_name)
+    priority SMALLINT DEFAULT 1 NOT NULL CONSTRAINT tasks_priority_check CHECK (priority BETWEEN 1 AND 3),
     created_by INTEGER NOT NULL, -- ID del usuario que creó la tarea
-    is_public INTEGER DEFAULT 0 NOT NULL, -- 0 para privado, 1 para público
+    is_public BOOLEAN DEFAULT FALSE NOT NULL,
     completed_photo_url TEXT, 
+    -- Palabras de la descripción para la búsqueda (parámetro q de la lista)
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('spanish', task_description)) STORED,
+    -- Motivo por el que la foto de tarea realizada no es válida (NULL: válida o sin comprobar)
+    completed_photo_error TEXT,
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Nombre de cada código de prioridad (el mismo orden que TASK_PRIORITIES en app.py).
+CREATE OR REPLACE FUNCTION task_priority_name(p_priority SMALLINT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT (ARRAY['Baja', 'Media', 'Alta'])[p_priority]
+$$;
+
 -- 3. NUEVA TABLA: task_assignments (para asignaciones de muchos a muchos)
 CREATE TABLE task_assignments (
     task_id INTEGER NOT NULL,
@@ -33,3 +40,188 @@ CREATE TABLE task_assignments (
     FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE, -- Si se borra la tarea, se borra la asignación
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE -- Si se borra el usuario, se borran sus asignaciones
 );
+
+-- 4. Índices secundarios
+-- Tareas de un usuario, en orden de más recientes
+CREATE INDEX idx_tasks_created_by ON tasks (created_by, id DESC);
+-- Tareas de un usuario filtradas por estado y fecha de vencimiento
+CREATE INDEX idx_tasks_created_by_status ON tasks (created_by, status, due_date);
+-- Tareas pendientes por fecha de vencimiento (vencidas / próximas a vencer)
+CREATE INDEX idx_tasks_pending_due_date ON tasks (due_date) WHERE status = 'pending';
+-- Tareas públicas de un usuario (vista view_shared_user_id), en el orden de cada página
+CREATE INDEX idx_tasks_public_recent ON tasks (created_by, id DESC) WHERE is_public;
+CREATE INDEX idx_tasks_public_due_date ON tasks (created_by, due_date, id DESC) WHERE is_public;
+CREATE INDEX idx_tasks_public_priority ON tasks (created_by, priority DESC, id DESC) WHERE is_public;
+-- Búsqueda por palabras completas
+CREATE INDEX idx_tasks_search ON tasks USING GIN (search_vector);
+-- Búsqueda por fragmentos de palabra (ILIKE), si pg_trgm está disponible
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        RAISE NOTICE 'pg_trgm no está disponible: la búsqueda por fragmentos no tendrá índice';
+        RETURN;
+    END IF;
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_tasks_description_trgm ON tasks USING GIN (task_description gin_trgm_ops);
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'Sin permiso para crear la extensión pg_trgm: la búsqueda por fragmentos no tendrá índice';
+END;
+$$;
+-- Tareas asignadas a un usuario (la clave primaria empieza por task_id)
+CREATE INDEX idx_task_assignments_user ON task_assignments (user_id, task_id);
+
+-- 5. Versión del conjunto de tareas de cada usuario (ETag de /api/tasks).
+-- Se incrementa en cada escritura que afecta a las tareas creadas por el usuario o asignadas a él.
+CREATE TABLE task_set_versions (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+-- 6. Contadores de tareas por usuario, alcance, estado y prioridad (resumen del panel).
+-- Los mantienen los triggers de tasks y task_assignments, así que cualquier
+-- escritura (rutas, operaciones en lote, importaciones) los actualiza.
+-- reconcile_counters.py los recalcula desde cero y detecta desviaciones.
+CREATE TABLE task_counters (
+    -- Sin clave foránea: al borrar un usuario, los borrados en cascada de sus
+    -- tareas y asignaciones dejan sus contadores a cero antes de desaparecer él.
+    user_id INTEGER NOT NULL,
+    scope TEXT NOT NULL, -- 'created' (tareas creadas por el usuario) o 'assigned' (asignadas a él)
+    status TEXT NOT NULL,
+    priority SMALLINT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, scope, status, priority)
+);
+
+-- Suma delta al contador (los decrementos solo actualizan filas existentes).
+CREATE OR REPLACE FUNCTION task_counters_add(p_user_id INTEGER, p_scope TEXT, p_status TEXT, p_priority SMALLINT, p_delta INTEGER)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_delta > 0 THEN
+        INSERT INTO task_counters (user_id, scope, status, priority, count)
+        VALUES (p_user_id, p_scope, p_status, p_priority, p_delta)
+        ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + p_delta;
+    ELSE
+        UPDATE task_counters SET count = count + p_delta
+        WHERE user_id = p_user_id AND scope = p_scope AND status = p_status AND priority = p_priority;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION task_counters_on_task() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM task_counters_add(NEW.created_by, 'created', NEW.status, NEW.priority, 1);
+        RETURN NEW;
+    ELSIF TG_OP = 'DELETE' THEN
+        -- BEFORE DELETE: las asignaciones que se borrarán en cascada aún existen.
+        PERFORM task_counters_add(OLD.created_by, 'created', OLD.status, OLD.priority, -1);
+        PERFORM task_counters_add(a.user_id, 'assigned', OLD.status, OLD.priority, -1)
+        FROM task_assignments a WHERE a.task_id = OLD.id;
+        RETURN OLD;
+    END IF;
+    -- UPDATE de estado, prioridad o creador
+    PERFORM task_counters_add(OLD.created_by, 'created', OLD.status, OLD.priority, -1);
+    PERFORM task_counters_add(NEW.created_by, 'created', NEW.status, NEW.priority, 1);
+    IF OLD.status IS DISTINCT FROM NEW.status OR OLD.priority IS DISTINCT FROM NEW.priority THEN
+        PERFORM task_counters_add(a.user_id, 'assigned', OLD.status, OLD.priority, -1)
+        FROM task_assignments a WHERE a.task_id = NEW.id;
+        PERFORM task_counters_add(a.user_id, 'assigned', NEW.status, NEW.priority, 1)
+        FROM task_assignments a WHERE a.task_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION task_counters_on_assignment() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    task RECORD;
+BEGIN
+    SELECT status, priority INTO task FROM tasks WHERE id = COALESCE(NEW.task_id, OLD.task_id);
+    -- Sin tarea: se está borrando y su trigger ya descontó las asignaciones.
+    IF FOUND THEN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM task_counters_add(NEW.user_id, 'assigned', task.status, task.priority, 1);
+        ELSE
+            PERFORM task_counters_add(OLD.user_id, 'assigned', task.status, task.priority, -1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Las inserciones se cuentan una vez por sentencia, agrupando las filas nuevas:
+-- un COPY o un INSERT de miles de filas actualiza cada contador una sola vez.
+CREATE OR REPLACE FUNCTION task_counters_on_tasks_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- Ordenado para bloquear las filas de contadores siempre en el mismo orden.
+    INSERT INTO task_counters (user_id, scope, status, priority, count)
+    SELECT created_by, 'created', status, priority, count(*) FROM new_tasks
+    GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+    ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION task_counters_on_assignments_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO task_counters (user_id, scope, status, priority, count)
+    SELECT a.user_id, 'assigned', t.status, t.priority, count(*)
+    FROM new_assignments a JOIN tasks t ON t.id = a.task_id
+    GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4
+    ON CONFLICT (user_id, scope, status, priority) DO UPDATE SET count = task_counters.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$;
+
+-- Al borrar varios usuarios a la vez, las asignaciones entre ellos pueden
+-- desaparecer en cascada sin descontarse; sus contadores se borran con ellos.
+CREATE OR REPLACE FUNCTION task_counters_on_user_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM task_counters WHERE user_id = OLD.id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER tasks_counters_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counters_on_tasks_insert();
+CREATE TRIGGER tasks_counters_update AFTER UPDATE OF status, priority, created_by ON tasks
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.priority IS DISTINCT FROM NEW.priority
+          OR OLD.created_by IS DISTINCT FROM NEW.created_by)
+    EXECUTE FUNCTION task_counters_on_task();
+CREATE TRIGGER tasks_counters_delete BEFORE DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_task();
+CREATE TRIGGER task_assignments_counters_insert AFTER INSERT ON task_assignments
+    REFERENCING NEW TABLE AS new_assignments
+    FOR EACH STATEMENT EXECUTE FUNCTION task_counters_on_assignments_insert();
+CREATE TRIGGER task_assignments_counters_delete AFTER DELETE ON task_assignments
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_assignment();
+CREATE TRIGGER users_counters_delete AFTER DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION task_counters_on_user_delete();
+
+-- 7. Cola de trabajos en segundo plano (jobs.py, worker.py y task_jobs.py).
+CREATE TABLE jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued'
+        CONSTRAINT jobs_status_check CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    run_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    -- Con clave, un mismo trabajo solo se encola una vez (hasta que se purga).
+    dedupe_key TEXT,
+    last_error TEXT,
+    locked_by TEXT,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Trabajos listos para ejecutarse, en orden.
+CREATE INDEX idx_jobs_ready ON jobs (run_at, id) WHERE status = 'queued';
+-- Trabajos en curso (para recuperar los de workers caídos) y terminados (purga y métricas).
+CREATE INDEX idx_jobs_running ON jobs (started_at) WHERE status = 'running';
+CREATE INDEX idx_jobs_finished ON jobs (finished_at) WHERE status IN ('done', 'failed');
+CREATE UNIQUE INDEX idx_jobs_dedupe ON jobs (kind, dedupe_key) WHERE dedupe_key IS NOT NULL;
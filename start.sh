@@ -1,7 +1,11 @@
 #!/usr/bin/env bash
 
-# Inicializar la base de datos
-python init_db.py # Llama al nuevo script Python
+# Comprobar el esquema de la base de datos (aplica las migraciones pendientes)
+python init_db.py
 
 # Iniciar Gunicorn
-gunicorn app:app -w 4 --bind 0.0.0.0:$PORT
\ No newline at end of file
+# GUNICORN_WORKER_CLASS=gevent atiende muchas peticiones simultáneas por worker
+# (hasta GUNICORN_WORKER_CONNECTIONS) con acceso no bloqueante a PostgreSQL.
+# La aplicación se carga una vez en el maestro (preload, ver gunicorn.conf.py).
+gunicorn 'app:create_app()' -k "${GUNICORN_WORKER_CLASS:-sync}" -w "${WEB_CONCURRENCY:-4}" \
+    --worker-connections "${GUNICORN_WORKER_CONNECTIONS:-1000}" --bind 0.0.0.0:$PORT
@@ -0,0 +1,93 @@
+// Actualización en vivo de la lista de tareas: escucha /events (Server-Sent
+// Events) y, por cada tarea que cambia, vuelve a pedir solo su fila a
+// /tasks/<id>/row. Las acciones Completar, Eliminar y Hacer Pública/Privada se
+// envían con fetch y actualizan la fila sin recargar la página.
+document.addEventListener('DOMContentLoaded', () => {
+    const list = document.getElementById('task-list');
+    if (!list) {
+        return;
+    }
+    const rowQuery = list.dataset.rowQuery;
+    const prependNew = list.dataset.prependNew === 'true';
+    const fetchHeaders = { 'X-Requested-With': 'fetch' };
+
+    function findRow(taskId) {
+        return document.getElementById(`task-${taskId}`);
+    }
+
+    function removeRow(taskId) {
+        const row = findRow(taskId);
+        if (row) {
+            row.remove();
+        }
+    }
+
+    async function refreshRow(taskId, isNew) {
+        const response = await fetch(`/tasks/${taskId}/row?${rowQuery}`, { headers: fetchHeaders });
+        if (response.status === 404) {
+            // La tarea ya no pertenece a esta vista (filtro, visibilidad o asignación).
+            removeRow(taskId);
+            return;
+        }
+        if (!response.ok) {
+            return;
+        }
+        const template = document.createElement('template');
+        template.innerHTML = (await response.text()).trim();
+        const newRow = template.content.firstElementChild;
+        const existing = findRow(taskId);
+        if (existing) {
+            existing.replaceWith(newRow);
+        } else if (isNew && prependNew) {
+            // Solo en la primera página ordenada por "Más Recientes", donde la tarea nueva va arriba.
+            const empty = document.getElementById('task-list-empty');
+            if (empty) {
+                empty.remove();
+            }
+            list.prepend(newRow);
+        }
+    }
+
+    function applyChange(change) {
+        change.tasks.forEach((taskId) => {
+            if (change.op === 'delete') {
+                removeRow(taskId);
+            } else {
+                refreshRow(taskId, change.op === 'create');
+            }
+        });
+    }
+
+    // Acciones sobre una fila sin recargar la lista completa. Si fetch falla se
+    // sigue el enlace normalmente.
+    list.addEventListener('click', async (event) => {
+        const link = event.target.closest('a[data-task-action]');
+        if (!link || event.defaultPrevented) {
+            return;
+        }
+        event.preventDefault();
+        const taskId = link.closest('[data-task-id]').dataset.taskId;
+        let response;
+        try {
+            response = await fetch(link.href, { headers: fetchHeaders });
+        } catch (error) {
+            window.location.href = link.href;
+            return;
+        }
+        if (response.status === 204) {
+            applyChange({ op: link.dataset.taskAction === 'delete' ? 'delete' : 'update', tasks: [taskId] });
+        } else if (response.headers.get('Content-Type') === 'application/json') {
+            alert((await response.json()).error);
+        } else {
+            window.location.href = link.href;
+        }
+    });
+
+    if (!window.EventSource) {
+        return;
+    }
+    const source = new EventSource(list.dataset.eventsUrl);
+    source.addEventListener('task', (event) => applyChange(JSON.parse(event.data)));
+    // El servidor pide recargar si el navegador se ha quedado atrás.
+    source.addEventListener('reload', () => window.location.reload());
+});
@@ -0,0 +1,105 @@
+// Selector de usuarios asignados: busca en /api/users/search mientras se escribe
+// y añade cada usuario elegido como un campo oculto "assigned_users".
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.user-picker').forEach((picker) => {
+        const searchUrl = picker.dataset.searchUrl;
+        const input = picker.querySelector('.user-picker-input');
+        const results = picker.querySelector('.user-picker-results');
+        const selected = picker.querySelector('.user-picker-selected');
+        let debounceTimer = null;
+        let lastQuery = '';
+
+        function isSelected(userId) {
+            return selected.querySelector(`[data-user-id="${userId}"]`) !== null;
+        }
+
+        function addUser(user) {
+            if (isSelected(user.id)) {
+                return;
+            }
+            const chip = document.createElement('span');
+            chip.className = 'user-picker-chip inline-flex items-center bg-blue-100 text-blue-800 text-sm rounded-full px-3 py-1';
+            chip.dataset.userId = user.id;
+            chip.textContent = `${user.username} (ID: ${user.id})`;
+
+            const remove = document.createElement('button');
+            remove.type = 'button';
+            remove.className = 'user-picker-remove ml-2 text-blue-600 hover:text-blue-900';
+            remove.setAttribute('aria-label', 'Quitar');
+            remove.innerHTML = '&times;';
+            chip.appendChild(remove);
+
+            const hidden = document.createElement('input');
+            hidden.type = 'hidden';
+            hidden.name = 'assigned_users';
+            hidden.value = user.id;
+            chip.appendChild(hidden);
+
+            selected.appendChild(chip);
+        }
+
+        function hideResults() {
+            results.classList.add('hidden');
+            results.innerHTML = '';
+        }
+
+        function showResults(users) {
+            results.innerHTML = '';
+            users.filter((user) => !isSelected(user.id)).forEach((user) => {
+                const item = document.createElement('li');
+                item.className = 'px-4 py-2 cursor-pointer hover:bg-blue-50 text-sm';
+                item.textContent = `${user.username} (ID: ${user.id})`;
+                item.addEventListener('mousedown', (event) => {
+                    event.preventDefault();
+                    addUser(user);
+                    input.value = '';
+                    hideResults();
+                });
+                results.appendChild(item);
+            });
+            results.classList.toggle('hidden', results.children.length === 0);
+        }
+
+        input.addEventListener('input', () => {
+            const query = input.value.trim();
+            clearTimeout(debounceTimer);
+            if (query === '') {
+                hideResults();
+                return;
+            }
+            debounceTimer = setTimeout(() => {
+                lastQuery = query;
+                fetch(`${searchUrl}?q=${encodeURIComponent(query)}`, { headers: { 'Accept': 'application/json' } })
+                    .then((response) => response.json())
+                    .then((data) => {
+                        // Ignorar respuestas de búsquedas ya superadas.
+                        if (query === lastQuery) {
+                            showResults(data.users);
+                        }
+                    })
+                    .catch(hideResults);
+            }, 150);
+        });
+
+        input.addEventListener('keydown', (event) => {
+            // Enter elige el primer resultado en lugar de enviar el formulario.
+            if (event.key === 'Enter') {
+                event.preventDefault();
+                const first = results.querySelector('li');
+                if (first) {
+                    first.dispatchEvent(new MouseEvent('mousedown'));
+                }
+            } else if (event.key === 'Escape') {
+                hideResults();
+            }
+        });
+
+        input.addEventListener('blur', hideResults);
+
+        selected.addEventListener('click', (event) => {
+            if (event.target.classList.contains('user-picker-remove')) {
+                event.target.closest('.user-picker-chip').remove();
+            }
+        });
+    });
+});
@@ -0,0 +1,44 @@
+# task_fields.py
+# Valores válidos de los campos de una tarea y su conversión desde texto,
+# compartidos por los formularios y la API (app.py) y por el importador
+# (import_tasks.py), que no carga la aplicación Flask.
+from datetime import datetime
+
+# Prioridades en orden: el código guardado en tasks.priority es la posición + 1
+# (el mismo orden que task_priority_name() en schema.sql).
+TASK_PRIORITIES = ('Baja', 'Media', 'Alta')
+TASK_STATUSES = ('pending', 'completed')
+
+# Columnas de la exportación (CSV y NDJSON), en este orden. import_tasks.py
+# acepta los mismos archivos: id y created_by no se importan.
+EXPORT_COLUMNS = ('id', 'task_description', 'status', 'due_date', 'priority', 'is_public',
+                  'completed_photo_url', 'created_by', 'created_by_username', 'assigned_users')
+# En CSV los usuarios asignados van en una sola columna, separados por este carácter.
+ASSIGNED_USERS_SEPARATOR = ';'
+
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y', 'si', 'sí', 'on')
+FALSE_VALUES = ('0', 'false', 'f', 'no', 'n', 'off', '')
+
+
+def priority_code(name):
+    # ValueError si la prioridad no es válida.
+    return TASK_PRIORITIES.index(name) + 1
+
+
+def parse_due_date(value):
+    # Fecha de vencimiento AAAA-MM-DD como date (None si está vacía). ValueError si no es válida.
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_bool(value):
+    # Booleano de un archivo importado (true/false, 1/0, sí/no...). ValueError si no es reconocible.
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(value)
@@ -0,0 +1,239 @@
+# task_jobs.py
+# Trabajos en segundo plano de las tareas (ver jobs.py): recordatorios de
+# vencimiento, barrido de tareas vencidas, comprobación de la foto de tarea
+# realizada y purga de la cola. Las rutas y el importador los encolan con
+# schedule_*() en la misma transacción que su escritura; worker.py los ejecuta.
+import http.client
+import ipaddress
+import json
+import logging
+import os
+import socket
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, time, timedelta
+
+from cache import VersionedCache
+from events import publish_task_change
+from jobs import RETENTION_DAYS, enqueue, enqueue_many, job, purge
+from task_versions import bump_task_versions, task_set_users
+
+logger = logging.getLogger(__name__)
+
+# Los recordatorios se envían REMINDERS_DAYS_BEFORE días antes del vencimiento,
+# a las REMINDERS_HOUR (hora de la zona horaria de la base de datos), a
+# REMINDERS_WEBHOOK_URL como JSON; sin URL solo se registran en el log.
+REMINDERS_DAYS_BEFORE = int(os.environ.get('REMINDERS_DAYS_BEFORE', 1))
+REMINDERS_HOUR = int(os.environ.get('REMINDERS_HOUR', 9))
+REMINDERS_WEBHOOK_URL = os.environ.get('REMINDERS_WEBHOOK_URL', '')
+OVERDUE_SWEEP_INTERVAL = float(os.environ.get('OVERDUE_SWEEP_INTERVAL', 3600))
+# Días hacia atrás que revisa cada barrido (por si el worker estuvo parado).
+OVERDUE_SWEEP_DAYS = 3
+PHOTO_CHECK_TIMEOUT = float(os.environ.get('PHOTO_CHECK_TIMEOUT', 5))
+PHOTO_MAX_REDIRECTS = 3
+WEBHOOK_TIMEOUT = 10
+
+
+def reminder_jobs(tasks, today=None):
+    # Recordatorios de las tareas pendientes [(id, fecha de vencimiento)] que
+    # aún no han vencido. La dedupe_key incluye la fecha: cambiarla programa
+    # un recordatorio nuevo, y el anterior se descarta al ejecutarse.
+    today = today or date.today()
+    return [({'task_id': task_id, 'due_date': due_date.isoformat(), 'reason': 'due'},
+             datetime.combine(due_date - timedelta(days=REMINDERS_DAYS_BEFORE), time(REMINDERS_HOUR)),
+             'due:%d:%s' % (task_id, due_date.isoformat()))
+            for task_id, due_date in tasks if due_date is not None and due_date >= today]
+
+
+def schedule_reminders(cursor, tasks):
+    return enqueue_many(cursor, 'task_reminder', reminder_jobs(tasks))
+
+
+def schedule_photo_check(cursor, task_id, url):
+    if url:
+        enqueue(cursor, 'photo_check', {'task_id': task_id, 'url': url})
+
+
+def deliver_reminder(reminder):
+    if not REMINDERS_WEBHOOK_URL:
+        logger.info('Recordatorio (%s): tarea %s "%s" vence el %s; asignada a %s', reminder['reason'],
+                    reminder['task_id'], reminder['task_description'], reminder['due_date'],
+                    ', '.join(reminder['assigned_users']) or 'nadie')
+        return
+    request = urllib.request.Request(REMINDERS_WEBHOOK_URL, data=json.dumps(reminder).encode(), method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    # Un error HTTP o de red lanza una excepción y el trabajo se reintenta.
+    with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT):
+        pass
+
+
+@job('task_reminder')
+def send_task_reminder(cursor, payload):
+    cursor.execute("""
+        SELECT t.task_description, t.status, t.due_date, task_priority_name(t.priority), u.username
+        FROM tasks t JOIN users u ON u.id = t.created_by
+        WHERE t.id = %s
+    """, (payload['task_id'],))
+    task = cursor.fetchone()
+    # Tarea borrada, completada o con otra fecha (que tiene su propio recordatorio).
+    if task is None or task[1] != 'pending' or task[2] is None or task[2].isoformat() != payload['due_date']:
+        return
+    cursor.execute('SELECT u.username FROM task_assignments a JOIN users u ON u.id = a.user_id '
+                   'WHERE a.task_id = %s ORDER BY u.username', (payload['task_id'],))
+    deliver_reminder({'reason': payload.get('reason', 'due'), 'task_id': payload['task_id'],
+                      'task_description': task[0], 'due_date': payload['due_date'], 'priority': task[3],
+                      'created_by_username': task[4], 'assigned_users': [row[0] for row in cursor.fetchall()]})
+
+
+@job('overdue_sweep', every=OVERDUE_SWEEP_INTERVAL)
+def sweep_overdue_tasks(cursor, payload):
+    # Un recordatorio por cada tarea pendiente que ha vencido (una sola vez por
+    # tarea y fecha, gracias a la dedupe_key).
+    cursor.execute("""
+        SELECT id, due_date FROM tasks
+        WHERE status = 'pending' AND due_date >= current_date - %s AND due_date < current_date
+    """, (OVERDUE_SWEEP_DAYS,))
+    jobs = [({'task_id': task_id, 'due_date': due_date.isoformat(), 'reason': 'overdue'}, None,
+             'overdue:%d:%s' % (task_id, due_date.isoformat()))
+            for task_id, due_date in cursor.fetchall()]
+    created = enqueue_many(cursor, 'task_reminder', jobs)
+    if created:
+        logger.info('Barrido de vencidas: %d recordatorios encolados', len(created))
+
+
+@job('jobs_purge', every=86400)
+def purge_finished_jobs(cursor, payload):
+    deleted = purge(cursor)
+    if deleted:
+        logger.info('%d trabajos terminados hace más de %g días eliminados', deleted, RETENTION_DAYS)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Las redirecciones se siguen a mano, comprobando cada destino.
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    # Se conecta a la dirección ya comprobada por _public_address() en lugar de
+    # volver a resolver el nombre: un DNS que cambia de respuesta entre la
+    # comprobación y la conexión (DNS rebinding) no puede llevar a una dirección
+    # interna. La cabecera Host (y el SNI de HTTPS) siguen usando el nombre.
+    def __init__(self, host, address=None, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+        self._create_connection = self._connect_to_address
+
+    def _connect_to_address(self, host_port, timeout, source_address):
+        return socket.create_connection((self.address, host_port[1]), timeout, source_address)
+
+
+class _PinnedHTTPSConnection(_PinnedHTTPConnection, http.client.HTTPSConnection):
+    pass
+
+
+class _PinnedHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, address):
+        super().__init__()
+        self.address = address
+
+    def http_open(self, req):
+        return self.do_open(_PinnedHTTPConnection, req, address=self.address)
+
+
+class _PinnedHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, address):
+        super().__init__()
+        self.address = address
+
+    def https_open(self, req):
+        return self.do_open(_PinnedHTTPSConnection, req, address=self.address)
+
+
+def _photo_opener(address):
+    # Sin proxies: la petición tiene que ir a la dirección comprobada.
+    return urllib.request.build_opener(_NoRedirect, urllib.request.ProxyHandler({}),
+                                       _PinnedHTTPHandler(address), _PinnedHTTPSHandler(address))
+
+
+def _public_address(host, port):
+    # El worker descarga URLs que escriben los usuarios: no debe poder usarse
+    # para llegar a servicios internos (localhost, red privada, metadatos).
+    # Devuelve la dirección a la que conectarse, o None si alguna de las del
+    # nombre no es pública.
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+    except socket.gaierror as e:
+        if e.errno == socket.EAI_AGAIN:
+            # Fallo temporal del DNS: se reintenta el trabajo.
+            raise
+        return None
+    except UnicodeError:
+        return None
+    if not addresses or not all(ipaddress.ip_address(address.split('%')[0]).is_global for address in addresses):
+        return None
+    return addresses[0]
+
+
+def check_photo_url(url):
+    # Devuelve None si la URL es una imagen accesible o el motivo por el que no
+    # lo es. Los fallos que pueden ser pasajeros (red, tiempo de espera, HTTP
+    # 5xx) lanzan la excepción para que el trabajo se reintente, en lugar de
+    # guardar como error de la foto lo que solo era un servidor caído.
+    for _ in range(PHOTO_MAX_REDIRECTS + 1):
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return 'La URL debe empezar por http:// o https://.'
+        try:
+            port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        except ValueError as e:
+            return f'La URL de la foto no es válida: {e}.'
+        address = _public_address(parsed.hostname, port)
+        if address is None:
+            return 'La dirección de la foto no es accesible.'
+        request = urllib.request.Request(url, headers={'User-Agent': 'gestion-tareas-photo-check'})
+        try:
+            # Solo se leen las cabeceras; la conexión se cierra sin descargar la imagen.
+            with _photo_opener(address).open(request, timeout=PHOTO_CHECK_TIMEOUT) as response:
+                content_type = response.headers.get_content_type()
+        except urllib.error.HTTPError as e:
+            location = e.headers.get('Location') if e.code in (301, 302, 303, 307, 308) else None
+            if location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if e.code >= 500:
+                raise
+            return f'La foto no está disponible (HTTP {e.code}).'
+        except ValueError as e:
+            return f'La URL de la foto no es válida: {e}.'
+        if not content_type.startswith('image/'):
+            return f'La URL no es una imagen ({content_type}).'
+        return None
+    return 'La foto redirige demasiadas veces.'
+
+
+@job('photo_check', max_attempts=3)
+def check_completed_photo(cursor, payload):
+    error = check_photo_url(payload['url'])
+    # Solo si la URL no ha cambiado desde que se encoló (si cambió, hay otra comprobación).
+    cursor.execute("""
+        UPDATE tasks SET completed_photo_error = %s
+        WHERE id = %s AND completed_photo_url = %s AND completed_photo_error IS DISTINCT FROM %s
+        RETURNING created_by, is_public
+    """, (error, payload['task_id'], payload['url'], error))
+    task = cursor.fetchone()
+    if task is None:
+        return None
+    # La fila cambia: nuevas versiones (ETag) y aviso a las páginas abiertas.
+    user_ids = task_set_users(cursor, [payload['task_id']])
+    bump_task_versions(cursor, user_ids)
+    publish_task_change(cursor, 'update', [payload['task_id']], user_ids, task[0] if task[1] else None)
+    if task[1]:
+        # Después de confirmar (con REDIS_URL, los workers web ven la nueva versión).
+        return lambda: public_task_cache.invalidate(task[0])
+    return None
+
+
+# Solo para invalidar las listas públicas en caché de los workers web a través de Redis.
+public_task_cache = VersionedCache('public_tasks')
@@ -0,0 +1,35 @@
+# task_versions.py
+# Versión del conjunto de tareas de cada usuario (tabla task_set_versions),
+# de la que /api/tasks deriva su ETag. La usan las rutas de app.py, el
+# importador y los trabajos en segundo plano, con cursores de dict o de tuplas.
+
+
+def task_set_users(cursor, task_ids):
+    # Usuarios en cuya lista "Mis Tareas" aparece alguna de estas tareas: el creador y los asignados.
+    cursor.execute("""
+        SELECT created_by AS user_id FROM tasks WHERE id = ANY(%s)
+        UNION
+        SELECT user_id FROM task_assignments WHERE task_id = ANY(%s)
+    """, (task_ids, task_ids))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def bump_task_versions(cursor, user_ids):
+    # Incrementa la versión del conjunto de tareas de cada usuario afectado por
+    # un cambio. La API de tareas deriva de ella su ETag, así que debe llamarse
+    # en la misma transacción que cualquier escritura en tasks o task_assignments.
+    # Los ids se ordenan para bloquear las filas siempre en el mismo orden.
+    user_ids = sorted({int(user_id) for user_id in user_ids})
+    if not user_ids:
+        return
+    cursor.execute("""
+        INSERT INTO task_set_versions (user_id, version)
+        SELECT user_id, 1 FROM unnest(%s::integer[]) AS user_id
+        ON CONFLICT (user_id) DO UPDATE SET version = task_set_versions.version + 1
+    """, (user_ids,))
+
+
+def get_task_set_version(cursor, user_id):
+    cursor.execute('SELECT version FROM task_set_versions WHERE user_id = %s', (user_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,74 @@
+# tests/test_bulk_api.py
+# Validación de POST /api/tasks/bulk. Necesita una base de datos PostgreSQL
+# con el esquema aplicado (init_db.py); sin DATABASE_URL se omite.
+#
+#     DATABASE_URL=postgresql://... python -m unittest discover tests
+import os
+import sys
+import unittest
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+@unittest.skipUnless(os.environ.get('DATABASE_URL'), 'sin DATABASE_URL')
+class BulkCreateTasksTest(unittest.TestCase):
+    def setUp(self):
+        from app import create_app, get_db
+        self.app = create_app()
+        self.get_db = get_db
+        # Usuario propio de la prueba: al borrarlo se borran sus tareas en cascada.
+        with self.app.app_context():
+            db = get_db()
+            cursor = db.cursor()
+            cursor.execute('INSERT INTO users (username, password_hash) VALUES (%s, %s) RETURNING id',
+                           ('test_bulk_' + uuid.uuid4().hex[:12], ''))
+            self.user_id = cursor.fetchone()['id']
+            cursor.close()
+            db.commit()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(self.user_id)
+            session['_fresh'] = True
+
+    def tearDown(self):
+        with self.app.app_context():
+            db = self.get_db()
+            cursor = db.cursor()
+            cursor.execute('DELETE FROM users WHERE id = %s', (self.user_id,))
+            cursor.close()
+            db.commit()
+
+    def task_count(self):
+        with self.app.app_context():
+            cursor = self.get_db().cursor()
+            cursor.execute('SELECT count(*) AS total FROM tasks WHERE created_by = %s', (self.user_id,))
+            total = cursor.fetchone()['total']
+            cursor.close()
+        return total
+
+    def test_creates_tasks(self):
+        response = self.client.post('/api/tasks/bulk', json={'tasks': [
+            {'task_description': 'Primera'}, {'task_description': 'Segunda', 'priority': 'Alta'}]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.get_json()['created']), 2)
+        self.assertEqual(self.task_count(), 2)
+
+    def test_rejects_non_string_description(self):
+        for description in (None, 5, ['Tarea'], {'texto': 'Tarea'}, True):
+            with self.subTest(description=description):
+                response = self.client.post('/api/tasks/bulk', json={'tasks': [
+                    {'task_description': 'Válida'}, {'task_description': description}]})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()['index'], 1)
+        self.assertEqual(self.task_count(), 0)
+
+    def test_rejects_missing_description(self):
+        response = self.client.post('/api/tasks/bulk', json={'tasks': [{'priority': 'Media'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['index'], 0)
+        self.assertEqual(self.task_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
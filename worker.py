@@ -0,0 +1,58 @@
+# worker.py
+# Proceso que ejecuta los trabajos en segundo plano (ver jobs.py y
+# task_jobs.py). Se arranca junto al proceso web (Procfile) y se pueden
+# arrancar tantos como haga falta: se reparten los trabajos sin coordinarse.
+#
+#     python worker.py           # hasta recibir SIGTERM o Ctrl+C
+#     python worker.py --once    # ejecuta los trabajos listos y termina (cron, pruebas)
+#
+# Al recibir SIGTERM termina el trabajo en curso (y su lote) antes de salir.
+import argparse
+import logging
+import os
+import signal
+import sys
+
+from db import get_database_url
+from jobs import Worker
+from logging_config import configure_logging
+import task_jobs  # noqa: F401  (registra los manejadores)
+
+logger = logging.getLogger('worker')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ejecuta los trabajos en segundo plano de la cola jobs.')
+    parser.add_argument('--once', action='store_true', help='ejecutar los trabajos listos y terminar')
+    parser.add_argument('--batch-size', type=int, default=int(os.environ.get('JOBS_BATCH_SIZE', 10)),
+                        help='trabajos que se toman de la cola cada vez')
+    parser.add_argument('--poll-interval', type=float, default=float(os.environ.get('JOBS_POLL_INTERVAL', 5)),
+                        help='segundos máximos de espera entre comprobaciones de la cola')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error('--batch-size debe ser al menos 1')
+
+    configure_logging()
+    worker = Worker(get_database_url(), batch_size=args.batch_size, poll_interval=args.poll_interval)
+    if args.once:
+        worker.connect()
+        try:
+            while worker.run_once():
+                pass
+        finally:
+            worker.close()
+        logger.info('Trabajos ejecutados: %s', worker.results)
+        return 1 if worker.results['failed'] else 0
+
+    def stop(signum, frame):
+        logger.info('Señal %d recibida: se termina el lote en curso', signum)
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())